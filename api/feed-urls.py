@@ -1,43 +1,74 @@
 """
-Simple endpoint to list all feed URLs
+List all feed URLs from the generated feed manifest
+Endpoint: /api/feed-urls
 """
 
 from http.server import BaseHTTPRequestHandler
 import json
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from napleton_feeds.manifest import MANIFEST_FILE
+from napleton_feeds.renderers import FEED_SUFFIXES
+from napleton_feeds.targets import platform_for_file
+
+MANIFEST_PATH = os.path.join(ROOT_DIR, 'feeds', MANIFEST_FILE)
+
+# (manifest mtime, encoded response) - built once per manifest version, not per request
+_RESPONSE = (None, None)
+
+
+def _build_response():
+    """Encode the listing for the current manifest, keeping the old 'feeds' shape"""
+    with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    feeds = {}
+    for feed in manifest['feeds']:
+        # Feeds of targets this deployment no longer registers are left out of the listing
+        platform = platform_for_file(feed['name'])
+        if platform is None:
+            continue
+        dealership = feed['name'][:-len(FEED_SUFFIXES[platform])]
+        feeds.setdefault(dealership, {})[platform] = feed['url']
+
+    response = {
+        'status': 'success',
+        'generated_at': manifest['generated_at'],
+        'total_dealerships': len(feeds),
+        'feeds': feeds,
+        'manifest': manifest['feeds']
+    }
+    return json.dumps(response, indent=2).encode()
+
+
+def _cached_response():
+    global _RESPONSE
+    mtime = os.path.getmtime(MANIFEST_PATH)
+    if _RESPONSE[0] != mtime:
+        _RESPONSE = (mtime, _build_response())
+    return _RESPONSE[1]
+
+
+# Preload so the first request on a warm instance does no parsing
+try:
+    _cached_response()
+except (OSError, ValueError):
+    pass
 
-# Dealership names for URL generation
-DEALERSHIPS = [
-    "Napleton_Chevrolet_Buick_GMC",
-    "Napleton_Ford_Columbus",
-    "Napleton_Chevrolet_Columbus",
-    "Napleton_Beaver_Dam_CDJR",
-    "Napleton_Downtown_Chevrolet",
-    "Napleton_Downtown_Buick_GMC",
-    "Napleton_Downtown_Hyundai",
-    "Genesis_of_Downtown_Chicago",
-    "Napleton_Chevrolet_Saint_Charles",
-    "Napleton_Buick_GMC"
-]
 
 class handler(BaseHTTPRequestHandler):
     def do_GET(self):
-        self.send_response(200)
+        try:
+            status, body = 200, _cached_response()
+        except (OSError, ValueError) as e:
+            status, body = 503, json.dumps({'status': 'error', 'error': f"Feed manifest unavailable: {e}"}).encode()
+
+        self.send_response(status)
         self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.end_headers()
-        
-        base_url = "https://napleton-feeds.vercel.app"
-        
-        feeds = {}
-        for dealership in DEALERSHIPS:
-            feeds[dealership] = {
-                'facebook': f"{base_url}/feeds/{dealership}_Facebook_AIA.xml",
-                'google': f"{base_url}/feeds/{dealership}_Google_VLA.xml"
-            }
-        
-        response = {
-            'status': 'success',
-            'total_dealerships': len(DEALERSHIPS),
-            'feeds': feeds
-        }
-        
-        self.wfile.write(json.dumps(response, indent=2).encode())
+        self.wfile.write(body)
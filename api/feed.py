@@ -0,0 +1,50 @@
+"""
+Serve a generated feed with ETag/304, gzip and byte-range support
+Endpoint: /api/feed?name=<feed file name>  (also /feed/<feed file name>)
+"""
+
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from napleton_feeds.renderers import FEED_TARGETS
+from napleton_feeds.serving import FeedCache, feed_response
+from napleton_feeds.targets import platform_for_file
+
+FEED_DIR = os.path.join(ROOT_DIR, 'feeds')
+
+# Feed bytes and gzip variants stay cached across warm invocations
+_FEED_CACHE = FeedCache()
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self._serve('GET')
+
+    def do_HEAD(self):
+        self._serve('HEAD')
+
+    def _serve(self, method):
+        params = parse_qs(urlparse(self.path).query)
+        name = (params.get('name') or [''])[0]
+        platform = platform_for_file(name)
+
+        # Only plain feed file names; no paths out of feeds/
+        if platform is None or os.path.basename(name) != name:
+            status, headers = 400, {'Content-Type': 'application/json'}
+            body = json.dumps({'error': "Expected ?name=<feed file name>"}).encode()
+        else:
+            status, headers, body = feed_response(_FEED_CACHE, os.path.join(FEED_DIR, name), self.headers, method,
+                                                  FEED_TARGETS[platform].content_type)
+
+        self.send_response(status)
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        if method != 'HEAD':
+            self.wfile.write(body)
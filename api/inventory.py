@@ -0,0 +1,89 @@
+"""
+Query the latest inventory snapshot (the flat CSV catalogs in feeds/)
+Endpoint: /api/inventory?[dealer=<id or name>][&make=][&model=][&condition=new|used|cpo][&body_style=suv,...]
+          [&min_price=][&max_price=][&min_mileage=][&max_mileage=][&min_days=][&max_days=]
+          [&sort=price|-price|mileage|-mileage|days_on_lot|-days_on_lot][&limit=50][&cursor=][&count=1]
+"""
+
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from napleton_feeds.config import select_dealerships, split_option_values
+from napleton_feeds.query import QUERY_DEFAULT_LIMIT, load_inventory_index
+
+FEED_DIR = os.path.join(ROOT_DIR, 'feeds')
+
+# Query parameter -> (range field, bound)
+RANGE_PARAMS = {
+    'min_price': ('price', 0), 'max_price': ('price', 1),
+    'min_mileage': ('mileage', 0), 'max_mileage': ('mileage', 1),
+    'min_days': ('days_on_lot', 0), 'max_days': ('days_on_lot', 1),
+}
+
+# Load the snapshot so the first request on a warm instance only queries
+try:
+    load_inventory_index(FEED_DIR)
+except OSError:
+    pass
+
+
+def run_query(params):
+    """Translate query parameters into an InventoryIndex query"""
+    filters = {}
+    dealer_ids = select_dealerships(params.get('dealer'))
+    if dealer_ids:
+        filters['dealer_id'] = dealer_ids
+    for field in ('make', 'model', 'condition', 'body_style'):
+        values = split_option_values(params.get(field))
+        if values:
+            filters[field] = values
+
+    ranges = {}
+    for param, (field, bound) in RANGE_PARAMS.items():
+        value = (params.get(param) or [''])[0]
+        if value:
+            try:
+                number = float(value)
+            except ValueError:
+                raise ValueError(f"{param} must be a number")
+            ranges.setdefault(field, [None, None])[bound] = number
+
+    try:
+        limit = int((params.get('limit') or [QUERY_DEFAULT_LIMIT])[0])
+    except ValueError:
+        raise ValueError("limit must be a number")
+
+    return load_inventory_index(FEED_DIR).query(
+        filters, {field: tuple(bounds) for field, bounds in ranges.items()},
+        sort=(params.get('sort') or [None])[0],
+        limit=limit,
+        cursor=(params.get('cursor') or [None])[0],
+        count_only=(params.get('count') or ['0'])[0] == '1'
+    )
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        start = time.perf_counter()
+        try:
+            status, response = 200, dict(status='success', **run_query(params))
+            response['query_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        except ValueError as e:
+            status, response = 400, {'status': 'error', 'error': str(e)}
+        except OSError as e:
+            status, response = 503, {'status': 'error', 'error': f"Inventory snapshot unavailable: {e}"}
+
+        body = json.dumps(response, indent=2).encode()
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
@@ -0,0 +1,42 @@
+"""
+Look up one vehicle in the generated feeds
+Endpoint: /api/vin-lookup?vin=<VIN or stock number>[&dealer=<id or name>][&platform=<target, e.g. google>]
+"""
+
+from http.server import BaseHTTPRequestHandler
+import json
+import os
+import sys
+from urllib.parse import parse_qs, urlparse
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from napleton_feeds.lookup import lookup_vehicle
+
+FEED_DIR = os.path.join(ROOT_DIR, 'feeds')
+
+
+class handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        key = (params.get('vin') or params.get('stock') or [''])[0]
+        dealer = (params.get('dealer') or [None])[0]
+        platform = (params.get('platform') or [None])[0]
+
+        if not key:
+            status = 400
+            response = {'success': False, 'error': "Missing 'vin' query parameter"}
+        else:
+            try:
+                results = lookup_vehicle(key, FEED_DIR, dealer, platform)
+                status = 200 if results else 404
+                response = {'success': bool(results), 'query': key, 'results': results}
+            except Exception as e:
+                status = 500
+                response = {'success': False, 'error': str(e)}
+
+        self.send_response(status)
+        self.send_header('Content-type', 'application/json')
+        self.end_headers()
+        self.wfile.write(json.dumps(response, indent=2).encode())
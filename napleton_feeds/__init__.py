@@ -0,0 +1,8 @@
+"""
+Shared core of the Napleton inventory feed generator
+
+Used by both scripts/generate-feeds-local.py (GitHub Actions) and the
+Vercel functions under api/. Submodules are imported on demand, and the
+heavy dependencies (paramiko, requests, numpy, the native CSV readers) are
+only loaded by the functions that need them, to keep cold starts short.
+"""
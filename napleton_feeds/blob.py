@@ -0,0 +1,98 @@
+"""
+Upload of generated feeds to Vercel Blob Storage
+"""
+
+import os
+
+# Vercel Blob Configuration
+BLOB_TOKEN = os.environ.get('BLOB_READ_WRITE_TOKEN', '')
+
+
+def upload_to_blob(filename, content, content_type='application/xml'):
+    """
+    Upload content to Vercel Blob Storage with STABLE URLs
+
+    ``content_type`` is the feed target's (e.g. text/csv for the catalogs).
+
+    Uses the actual Vercel Blob REST API that the @vercel/blob SDK uses internally.
+    This is a server upload directly from Python.
+    """
+    # requests is only needed by the Vercel function, and only once it uploads
+    import requests
+
+    if not BLOB_TOKEN:
+        print("✗ No BLOB_TOKEN configured")
+        return None
+
+    try:
+        # Step 1: Request upload URL from Vercel Blob API
+        # This is what @vercel/blob's put() does internally
+        api_url = "https://api.vercel.com/v1/blob"
+
+        headers = {
+            'Authorization': f'Bearer {BLOB_TOKEN}',
+            'Content-Type': 'application/json'
+        }
+
+        # Request body to get upload URL
+        payload = {
+            'pathname': filename,
+            'type': content_type,
+            'addRandomSuffix': False  # Boolean for stable URLs!
+        }
+
+        print(f"📤 Requesting upload URL for: {filename}")
+
+        # Get the upload URL
+        response = requests.post(
+            api_url,
+            headers=headers,
+            json=payload,
+            timeout=10
+        )
+
+        print(f"   API response: {response.status_code}")
+
+        if response.status_code not in [200, 201]:
+            print(f"✗ Failed to get upload URL: {response.status_code} - {response.text}")
+            return None
+
+        upload_data = response.json()
+        print(f"   Upload data keys: {list(upload_data.keys())}")
+
+        # Step 2: Upload content using the provided URL
+        upload_url = upload_data.get('uploadUrl')
+        final_url = upload_data.get('url')  # This is the final download URL
+
+        if not upload_url:
+            print(f"✗ No uploadUrl in response: {upload_data}")
+            return None
+
+        print(f"   Uploading to: {upload_url[:50]}...")
+
+        # Upload the actual content
+        upload_headers = {
+            'Content-Type': content_type,
+        }
+
+        upload_response = requests.put(
+            upload_url,
+            data=content.encode('utf-8'),
+            headers=upload_headers,
+            timeout=30
+        )
+
+        print(f"   Upload status: {upload_response.status_code}")
+
+        if upload_response.status_code in [200, 201]:
+            print(f"✓ Success: {final_url}")
+            return final_url
+        else:
+            print(f"✗ Upload failed: {upload_response.status_code} - {upload_response.text}")
+            return None
+
+    except Exception as e:
+        print(f"✗ Exception: {e}")
+        import traceback
+        traceback.print_exc()
+        return None
@@ -0,0 +1,239 @@
+"""
+Microsoft Advertising autos, TikTok automotive and flat CSV/TSV catalog targets
+"""
+
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from .descriptions import feed_description
+from .normalize import PHOTO_CACHE_SIZE, map_body_style_facebook, parse_photos
+from .targets import DelimitedFeedTarget, DelimitedWriter, FeedWriter, XmlFeedTarget, register_target
+
+# Images per vehicle in the Microsoft and TikTok catalogs
+CATALOG_MAX_IMAGES = 20
+
+
+def _condition(vehicle):
+    """'new', 'cpo' or 'used' from the New/Used column"""
+    condition_raw = (vehicle.get('New/Used') or '').upper()
+    if condition_raw == 'N':
+        return 'new'
+    if condition_raw == 'C':
+        return 'cpo'
+    return 'used'
+
+
+def _title(vehicle):
+    parts = (vehicle.get(field) or '' for field in ('Year', 'Make', 'Model', 'Trim'))
+    return ' '.join(part.strip() for part in parts if part.strip())
+
+
+def _vdp_url(vehicle, dealership, vin):
+    return (vehicle.get('VDPURL') or '').strip() or f"{dealership['website']}/inventory/details/{vin}"
+
+
+def _mileage(item, stats):
+    """Mileage for a catalog row: 0 for new vehicles without one, None when unknown"""
+    if item.miles_bad and stats:
+        stats.coerce(item.row, 'bad_miles')
+    if item.miles is None and _condition(item.row) == 'new':
+        return 0
+    return item.miles
+
+
+def _listable(item, stats):
+    """(vin, price) of a vehicle the ad catalogs accept, or None after recording the skip"""
+    vin = (item.row.get('VIN') or '').strip()
+    price = item.price or item.msrp
+    reason = 'no_vin' if not vin else 'no_price' if not price else 'no_photos' if not item.photos else None
+    if reason:
+        if stats:
+            stats.skip(item.row, reason)
+        return None
+    return vin, price
+
+
+@lru_cache(maxsize=PHOTO_CACHE_SIZE)
+def _microsoft_images(photo_url):
+    """Escaped <image> blocks of a gallery, serialized once per PhotoURL string"""
+    return ''.join(f"    <image>\n      <url>{escape(url)}</url>\n    </image>\n"
+                   for url in parse_photos(photo_url)[:CATALOG_MAX_IMAGES])
+
+
+class MicrosoftAutosWriter(FeedWriter):
+    """Microsoft Advertising autos listings, written as text as vehicles arrive"""
+
+    def __init__(self, dealer_id, dealership, stats=None):
+        self.dealer_id = dealer_id
+        self.dealership = dealership
+        self.stats = stats
+        self.parts = ['<?xml version="1.0" encoding="utf-8"?>\n<listings>\n',
+                      f"  <title>{escape(dealership['name'])} Inventory Feed</title>\n"]
+        components = (('addr1', 'street_address'), ('city', 'city'), ('region', 'region'),
+                      ('postal_code', 'postal_code'), ('country', 'country'))
+        # Same for every listing of the dealer
+        self.address = '    <address format="simple">\n' + ''.join(
+            f'      <component name="{name}">{escape(dealership[field])}</component>\n'
+            for name, field in components
+        ) + '    </address>\n'
+
+    def _element(self, tag, text):
+        self.parts.append(f"    <{tag}>{escape(str(text))}</{tag}>\n")
+
+    def add(self, item):
+        listable = _listable(item, self.stats)
+        if listable is None:
+            return
+        vin, price = listable
+        vehicle = item.row
+        condition = _condition(vehicle)
+
+        self.parts.append('  <listing>\n')
+        self._element('vehicle_id', vin)
+        self._element('title', _title(vehicle))
+        self._element('description', feed_description(vehicle, self.stats) or _title(vehicle))
+        self._element('url', _vdp_url(vehicle, self.dealership, vin))
+        for tag, field in (('make', 'Make'), ('model', 'Model'), ('year', 'Year'), ('trim', 'Trim'),
+                           ('exterior_color', 'ExteriorColor'), ('interior_color', 'InteriorColor')):
+            value = (vehicle.get(field) or '').strip()
+            if value:
+                self._element(tag, value)
+        mileage = _mileage(item, self.stats)
+        if mileage is not None:
+            self.parts.append(f"    <mileage>\n      <value>{mileage}</value>\n      <unit>MI</unit>\n    </mileage>\n")
+        self._element('body_style', map_body_style_facebook(vehicle['Body']) if vehicle.get('Body') else 'OTHER')
+        self._element('price', f"{price:.2f} USD")
+        if item.msrp and item.msrp != price:
+            self._element('msrp', f"{item.msrp:.2f} USD")
+        self._element('state_of_vehicle', condition.upper())
+        self._element('vin', vin)
+        self._element('dealer_id', self.dealer_id)
+        self._element('dealer_name', self.dealership['name'])
+        self.parts.append(self.address)
+        self.parts.append(_microsoft_images(item.photo_url))
+        if item.days is not None:
+            self._element('days_on_lot', item.days)
+        self.parts.append('  </listing>\n')
+
+    def finish(self):
+        self.parts.append('</listings>\n')
+        return ''.join(self.parts)
+
+
+class MicrosoftAutosTarget(XmlFeedTarget):
+    name = 'microsoft'
+    suffix = '_Microsoft_Autos.xml'
+    item_tag = 'listing'
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return MicrosoftAutosWriter(dealer_id, dealership, feed_stats)
+
+
+class TikTokAutoWriter(DelimitedWriter):
+    """TikTok automotive catalog: one CSV line per vehicle with a price and photos"""
+
+    header = (
+        'vehicle_id', 'vin', 'title', 'description', 'link', 'image_link', 'additional_image_link',
+        'price', 'make', 'model', 'year', 'trim', 'mileage.value', 'mileage.unit', 'body_style',
+        'exterior_color', 'state_of_vehicle', 'dealer_name', 'address.addr1', 'address.city',
+        'address.region', 'address.postal_code', 'address.country'
+    )
+
+    def __init__(self, dealer_id, dealership, stats=None):
+        super().__init__()
+        self.dealership = dealership
+        self.stats = stats
+        self.address = tuple(dealership[field] for field in
+                             ('street_address', 'city', 'region', 'postal_code', 'country'))
+
+    def row(self, item):
+        listable = _listable(item, self.stats)
+        if listable is None:
+            return None
+        vin, price = listable
+        vehicle = item.row
+        mileage = _mileage(item, self.stats)
+        return (
+            vin, vin, _title(vehicle), feed_description(vehicle, self.stats) or _title(vehicle),
+            _vdp_url(vehicle, self.dealership, vin), item.photos[0],
+            ','.join(item.photos[1:CATALOG_MAX_IMAGES]), f"{price:.2f} USD",
+            vehicle.get('Make'), vehicle.get('Model'), vehicle.get('Year'), vehicle.get('Trim'),
+            mileage, 'MI' if mileage is not None else '',
+            map_body_style_facebook(vehicle['Body']) if vehicle.get('Body') else 'OTHER',
+            vehicle.get('ExteriorColor'), _condition(vehicle).upper(), self.dealership['name']
+        ) + self.address
+
+
+class TikTokAutoTarget(DelimitedFeedTarget):
+    name = 'tiktok'
+    suffix = '_TikTok_Auto.csv'
+    content_type = 'text/csv; charset=utf-8'
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return TikTokAutoWriter(dealer_id, dealership, feed_stats)
+
+
+class FlatCatalogWriter(DelimitedWriter):
+    """Every vehicle with a VIN and its normalized values, for spreadsheets and partners"""
+
+    header = (
+        'dealer_id', 'vin', 'stock_number', 'condition', 'year', 'make', 'model', 'trim', 'body_style',
+        'exterior_color', 'interior_color', 'price', 'msrp', 'mileage', 'days_on_lot', 'age_label',
+        'url', 'image_url', 'additional_image_urls', 'description'
+    )
+
+    def __init__(self, dealer_id, dealership, stats=None):
+        super().__init__()
+        self.dealer_id = dealer_id
+        self.dealership = dealership
+        self.stats = stats
+
+    def row(self, item):
+        vehicle = item.row
+        vin = (vehicle.get('VIN') or '').strip()
+        if not vin:
+            if self.stats:
+                self.stats.skip(vehicle, 'no_vin')
+            return None
+        if item.miles_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_miles')
+        if item.days_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_days_on_lot')
+        return (
+            self.dealer_id, vin, vehicle.get('StockNo'), _condition(vehicle), vehicle.get('Year'),
+            vehicle.get('Make'), vehicle.get('Model'), vehicle.get('Trim'), vehicle.get('Body'),
+            vehicle.get('ExteriorColor'), vehicle.get('InteriorColor'),
+            f"{item.price:.2f}" if item.price else '', f"{item.msrp:.2f}" if item.msrp else '',
+            item.miles, item.days, item.age_label, _vdp_url(vehicle, self.dealership, vin),
+            item.photos[0] if item.photos else '', '|'.join(item.photos[1:]), vehicle.get('Description')
+        )
+
+
+class FlatTsvCatalogWriter(FlatCatalogWriter):
+    delimiter = '\t'
+
+
+class FlatCatalogTarget(DelimitedFeedTarget):
+    name = 'csv'
+    suffix = '_Catalog.csv'
+    content_type = 'text/csv; charset=utf-8'
+    id_column = 'stock_number'
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return FlatCatalogWriter(dealer_id, dealership, feed_stats)
+
+
+class FlatTsvCatalogTarget(FlatCatalogTarget):
+    name = 'tsv'
+    suffix = '_Catalog.tsv'
+    content_type = 'text/tab-separated-values; charset=utf-8'
+    delimiter = '\t'
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return FlatTsvCatalogWriter(dealer_id, dealership, feed_stats)
+
+
+register_target(MicrosoftAutosTarget())
+register_target(TikTokAutoTarget())
+register_target(FlatCatalogTarget())
+register_target(FlatTsvCatalogTarget())
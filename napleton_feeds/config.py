@@ -0,0 +1,93 @@
+"""
+SFTP settings, output location and dealership configuration
+"""
+
+import json
+import os
+
+# SFTP Configuration from environment
+SFTP_CONFIG = {
+    'host': os.environ.get('SFTP_HOST'),
+    'username': os.environ.get('SFTP_USERNAME'),
+    'password': os.environ.get('SFTP_PASSWORD'),
+    'directory': os.environ.get('SFTP_DIRECTORY', '/Vincue')
+}
+
+# Output directory
+FEED_DIR = os.environ.get('FEED_DIR', 'feeds')
+
+# Public location of the files in FEED_DIR, for the feed manifest
+FEED_BASE_URL = os.environ.get('FEED_BASE_URL', 'https://napleton-feeds.vercel.app/feeds').rstrip('/')
+
+# Dealership registry: dealerships by Vincue dealer ID, plus retired IDs still found in
+# exports (JSON, or TOML on Python 3.11+)
+DEALERSHIPS_FILE = os.environ.get(
+    'DEALERSHIPS_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dealerships.json')
+)
+
+# Fields every dealership entry needs for both feeds
+DEALERSHIP_FIELDS = (
+    'name', 'website', 'address', 'street_address', 'city', 'region', 'country', 'postal_code', 'store_code'
+)
+
+
+def load_dealerships(path):
+    """Load (dealerships, aliases) from a registry file
+
+    Aliases map a retired dealer ID to a configured one, either directly
+    ("216163": "50912") or as {"dealer_id": ..., "note": ...}.
+    """
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            registry = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            registry = json.load(f)
+
+    dealerships = {}
+    for dealer_id, dealership in registry.get('dealerships', {}).items():
+        missing = [field for field in DEALERSHIP_FIELDS if not dealership.get(field)]
+        if missing:
+            raise ValueError(f"{path}: dealership {dealer_id} is missing {', '.join(missing)}")
+        dealerships[str(dealer_id)] = {field: str(value) for field, value in dealership.items()}
+
+    aliases = {}
+    for alias, target in registry.get('aliases', {}).items():
+        dealer_id = str(target['dealer_id'] if isinstance(target, dict) else target)
+        if dealer_id not in dealerships:
+            raise ValueError(f"{path}: alias {alias} points to unknown dealership {dealer_id}")
+        aliases[str(alias)] = dealer_id
+    return dealerships, aliases
+
+
+DEALERSHIPS, DEALER_ID_ALIASES = load_dealerships(DEALERSHIPS_FILE)
+
+
+def split_option_values(values):
+    """Flatten repeated and comma-separated option values"""
+    return [part.strip() for value in values or [] for part in value.split(',') if part.strip()]
+
+
+def select_dealerships(values):
+    """Resolve --dealer / ?dealer= values to configured dealer IDs (None means all)
+
+    Accepts dealer IDs, retired IDs listed in DEALER_ID_ALIASES, or dealership names.
+    """
+    selected = []
+    for value in split_option_values(values):
+        dealer_id = DEALER_ID_ALIASES.get(value, value)
+        if dealer_id not in DEALERSHIPS:
+            by_name = [d for d, info in DEALERSHIPS.items() if info['name'].lower() == value.lower()]
+            if not by_name:
+                raise ValueError(f"Unknown dealer: {value}")
+            dealer_id = by_name[0]
+        if dealer_id not in selected:
+            selected.append(dealer_id)
+    return selected or None
+
+
+def source_dealer_ids(dealer_ids):
+    """Raw DealerID values in the export that belong to the given dealerships"""
+    wanted = set(dealer_ids)
+    return wanted | {alias for alias, dealer_id in DEALER_ID_ALIASES.items() if dealer_id in wanted}
@@ -0,0 +1,98 @@
+"""
+Plain-text vehicle descriptions for ad feeds: HTML and boilerplate removal, length limits
+"""
+
+import hashlib
+import html
+import os
+import re
+from collections import OrderedDict
+
+# Google's g:description limit, also used for the other ad catalogs
+DESCRIPTION_MAX_CHARS = 5000
+
+# Distinct Description texts kept cleaned between rows and runs
+DESCRIPTION_CACHE_SIZE = int(os.environ.get('DESCRIPTION_CACHE_SIZE', '20000'))
+
+# Vincue exports separate lines with a literal backslash-n as well as real newlines
+_LINE_BREAK = re.compile(r'\\n|\r\n?|\n|<\s*br\s*/?\s*>|<\s*/\s*(?:p|div|li|h\d|ul|ol|tr)\s*>', re.I)
+_TAG = re.compile(r'<[^>]*>')
+# [www.example.com](https://www.example.com) -> www.example.com
+_MARKDOWN_LINK = re.compile(r'\[([^\]]*)\]\([^)\s]*\)')
+# The dealer pricing disclaimer paragraph: from the line of its heading to the next
+# blank line or section break
+_BOILERPLATE = re.compile(r'Online Pricing Disclaimer')
+_PARAGRAPH_END = re.compile(r'\n[^\S\n]*\n|<\s*(?:h\d|hr)\b', re.I)
+_LEADING_SPACE = re.compile(r'\s*')
+_SENTENCE_END = ('.', '!', '?', ':', ';', ',')
+
+# (text digest, max_chars) -> (plain text, plain text bytes, truncated), least recently used first
+_CLEANED = OrderedDict()
+
+
+def _over_escaped(text):
+    """Whether every quote in the text is doubled, as in exports quoted once more than CSV needs (20"" X 9"")"""
+    return '""' in text and '"' not in text.replace('""', '')
+
+
+def _clean(text, max_chars):
+    """(plain text, plain text bytes, truncated) of a Description value"""
+    if _over_escaped(text):
+        text = text.replace('""', '"')
+    lines = _LINE_BREAK.sub('\n', text)
+    boilerplate = _BOILERPLATE.search(lines)
+    if boilerplate:
+        # Blank lines between the heading and its paragraph don't end it
+        heading_end = lines.find('\n', boilerplate.end())
+        end = None
+        if heading_end != -1:
+            end = _PARAGRAPH_END.search(lines, _LEADING_SPACE.match(lines, heading_end).end())
+        lines = lines[:lines.rfind('\n', 0, boilerplate.start()) + 1] + (lines[end.start():] if end else '')
+    lines = _MARKDOWN_LINK.sub(r'\1', html.unescape(_TAG.sub(' ', lines)))
+
+    sentences = []
+    for line in lines.split('\n'):
+        line = ' '.join(line.split())
+        if line:
+            sentences.append(line if line.endswith(_SENTENCE_END) else line + '.')
+    plain = ' '.join(sentences)
+
+    truncated = len(plain) > max_chars
+    if truncated:
+        # Leave room for the ellipsis and don't end on a partial word
+        cut = plain[:max_chars - 1]
+        if not plain[max_chars - 1].isspace():
+            cut = cut.rsplit(' ', 1)[0]
+        plain = cut.rstrip(' ,;:-') + '…'
+    return plain, len(plain.encode('utf-8')), truncated
+
+
+def clean_description(text, max_chars=DESCRIPTION_MAX_CHARS):
+    """(plain text, source bytes, plain text bytes, truncated) of a Description value
+
+    Lines and list items are joined into sentences, the pricing disclaimer
+    paragraph is dropped, and text over max_chars is cut at a word boundary.
+    Results are cached by a digest of the text rather than the text itself.
+    """
+    source = text.encode('utf-8')
+    key = (hashlib.blake2b(source, digest_size=16).digest(), max_chars)
+    cleaned = _CLEANED.get(key)
+    if cleaned is None:
+        cleaned = _CLEANED[key] = _clean(text, max_chars)
+        if len(_CLEANED) > DESCRIPTION_CACHE_SIZE:
+            _CLEANED.popitem(last=False)
+    else:
+        _CLEANED.move_to_end(key)
+    plain, plain_bytes, truncated = cleaned
+    return plain, len(source), plain_bytes, truncated
+
+
+def feed_description(vehicle, stats=None, max_chars=DESCRIPTION_MAX_CHARS):
+    """Cleaned Description of a row ('' without one), recording the bytes saved in stats"""
+    text = vehicle.get('Description')
+    if not text:
+        return ''
+    plain, source_bytes, plain_bytes, truncated = clean_description(text, max_chars)
+    if stats:
+        stats.description(source_bytes, plain_bytes, truncated)
+    return plain
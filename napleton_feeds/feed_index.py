@@ -0,0 +1,209 @@
+"""
+Feed writing with a sidecar VIN index of byte ranges
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from datetime import datetime
+
+
+# Sidecar index written next to each feed: VIN -> byte range of its item
+INDEX_SUFFIX = '.index.json'
+
+# Files are written and fsynced here first, then renamed over the published copy
+STAGING_DIR = '.staging'
+
+
+def feed_digest(feed_bytes):
+    """Content hash of a feed, also used as its HTTP ETag"""
+    return hashlib.blake2b(feed_bytes, digest_size=16).hexdigest()
+
+
+def gzip_feed(feed_bytes):
+    """Deterministic gzip of a feed, as served to clients that accept it"""
+    return gzip.compress(feed_bytes, compresslevel=9, mtime=0)
+
+
+def index_filename(feed_name):
+    """Sidecar index file name for a feed file name
+
+    XML feeds keep their original ``<name>.index.json``; other formats keep
+    their extension so e.g. a CSV and a TSV catalog never share an index.
+    """
+    if feed_name.endswith('.xml'):
+        feed_name = feed_name[:-len('.xml')]
+    return feed_name + INDEX_SUFFIX
+
+
+def build_feed_index(feed_bytes, platform):
+    """Map each VIN (and alternate ID such as a Google stock number) to the byte offset and length of its item"""
+    # The target registry imports this module; importing renderers registers every target
+    from .renderers import FEED_TARGETS
+    return FEED_TARGETS[platform].index(feed_bytes)
+
+
+def content_digest(feed_bytes, platform):
+    """Hash of a feed's content, leaving out what its target changes on every render"""
+    from .renderers import FEED_TARGETS
+    return feed_digest(FEED_TARGETS[platform].stable_content(feed_bytes))
+
+
+def _fsync_directory(path):
+    """Persist renames in a directory (not supported on every platform)"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _umask():
+    # Only readable by setting it; done once at import, before any publish threads start
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+# Mode of a newly published file, as open() would create it
+_NEW_FILE_MODE = 0o666 & ~_umask()
+
+
+def _file_mode(path):
+    """Permission bits for a new copy of path: the existing file's, else 0666 less the umask"""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return _NEW_FILE_MODE
+
+
+def publish_file(path, data):
+    """Atomically replace path with data
+
+    The bytes are written and fsynced in the directory's STAGING_DIR, then
+    renamed over path, so readers see either the old file or the new one,
+    never a partial write.
+    """
+    directory, name = os.path.split(path)
+    staging = os.path.join(directory, STAGING_DIR)
+    os.makedirs(staging, exist_ok=True)
+    with tempfile.NamedTemporaryFile('wb', dir=staging, prefix=name + '.', delete=False) as f:
+        try:
+            # NamedTemporaryFile creates 0600; keep the published file's mode, else the usual one
+            os.chmod(f.name, _file_mode(path))
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        except BaseException:
+            f.close()
+            os.remove(f.name)
+            raise
+    try:
+        os.replace(f.name, path)
+    except BaseException:
+        os.remove(f.name)
+        raise
+    _fsync_directory(directory or '.')
+
+
+def clear_staging(feed_dir):
+    """Remove STAGING_DIR, with any files an interrupted run left in it"""
+    staging = os.path.join(feed_dir, STAGING_DIR)
+    if os.path.isdir(staging):
+        for name in os.listdir(staging):
+            os.remove(os.path.join(staging, name))
+        os.rmdir(staging)
+
+
+def _read_index(index_path):
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+# Index fields that come from the feed bytes (covered by content_hash) or the time of writing
+_RENDER_FIELDS = ('generated_at', 'size', 'gzip_size', 'hash', 'vehicles', 'stock_numbers')
+
+
+def _published_content_hash(path, platform):
+    try:
+        with open(path, 'rb') as f:
+            return content_digest(f.read(), platform)
+    except OSError:
+        return None
+
+
+def _unchanged(published, index, path):
+    """Whether the published feed and index already hold this content
+
+    Compares content hashes, so a Google feed whose only change is its
+    <updated> time keeps the published version, and checks the published
+    feed's bytes against the hash rather than trusting its index.
+    """
+    if published is None or published.get('content_hash') != index['content_hash']:
+        return False
+    fields = (set(published) | set(index)).difference(_RENDER_FIELDS)
+    if any(published.get(field) != index.get(field) for field in fields):
+        return False
+    return _published_content_hash(path, index['platform']) == index['content_hash']
+
+
+def write_feed(path, content, platform, dealer_id, skipped, row_hashes=None):
+    """Publish a feed and its sidecar VIN index; returns False if both were already up to date
+
+    ``row_hashes`` (source row fingerprints by vehicle key) are stored so the
+    next run can tell how many rows changed. The feed is replaced before its
+    index, each with publish_file; a feed whose content and index match the
+    published ones is left alone (see _unchanged).
+    """
+    feed_bytes = content.encode('utf-8')
+    vehicles, stock_numbers = build_feed_index(feed_bytes, platform)
+    index = {
+        'feed': os.path.basename(path),
+        'platform': platform,
+        'dealer_id': dealer_id,
+        'generated_at': datetime.now().isoformat(),
+        'size': len(feed_bytes),
+        'gzip_size': len(gzip_feed(feed_bytes)),
+        'hash': feed_digest(feed_bytes),
+        'content_hash': content_digest(feed_bytes, platform),
+        'vehicles': vehicles,
+        'stock_numbers': stock_numbers,
+        'skipped': skipped
+    }
+    if row_hashes is not None:
+        index['row_hashes'] = row_hashes
+
+    index_path = os.path.join(os.path.dirname(path), index_filename(os.path.basename(path)))
+    if _unchanged(_read_index(index_path), index, path):
+        return False
+
+    publish_file(path, feed_bytes)
+    publish_file(index_path, json.dumps(index, indent=1, sort_keys=True).encode('utf-8'))
+    return True
+
+
+def load_row_hashes(feed_dir):
+    """Source row fingerprints of the feeds already in feed_dir, by feed file name"""
+    row_hashes = {}
+    for name in os.listdir(feed_dir) if os.path.isdir(feed_dir) else []:
+        if not name.endswith(INDEX_SUFFIX):
+            continue
+        try:
+            with open(os.path.join(feed_dir, name), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if 'row_hashes' in index:
+            row_hashes[index['feed']] = index['row_hashes']
+    return row_hashes
@@ -0,0 +1,475 @@
+"""
+CSV parsing and per-dealer partitioning of the inventory export
+"""
+
+import csv
+import io
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+from datetime import datetime
+
+from .config import DEALER_ID_ALIASES, DEALERSHIPS, source_dealer_ids
+from .normalize import parse_days_on_lot
+from .stats import skip_key
+
+
+# CSV reader backend: 'pyarrow', 'polars', 'stdlib', or 'auto' (first one installed)
+CSV_BACKEND = os.environ.get('CSV_BACKEND', 'auto')
+
+
+def _read_rows_stdlib(csv_file, dealer_ids=None):
+    """Stream inventory rows with csv.DictReader"""
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        if not dealer_ids:
+            # Short rows get '' rather than None so every backend yields plain strings
+            yield from csv.DictReader(f, restval='')
+            return
+
+        # Filter on the raw DealerID field so other dealers' rows never become dicts
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        if 'DealerID' not in fieldnames:
+            return
+        column = fieldnames.index('DealerID')
+        wanted = source_dealer_ids(dealer_ids)
+        for values in reader:
+            if column < len(values) and values[column].strip() in wanted:
+                yield _row_dict(fieldnames, values)
+
+
+def _read_rows_pyarrow(csv_file, dealer_ids=None):
+    """Read inventory rows with pyarrow's multithreaded CSV parser"""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pa_csv
+
+    table = pa_csv.read_csv(
+        csv_file,
+        read_options=pa_csv.ReadOptions(use_threads=True),
+        # Vincue descriptions contain quoted newlines
+        parse_options=pa_csv.ParseOptions(newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.string() for name in _read_header(csv_file)},
+            strings_can_be_null=False,
+            quoted_strings_can_be_null=False
+        )
+    )
+    if dealer_ids:
+        wanted = pa.array(sorted(source_dealer_ids(dealer_ids)), pa.string())
+        table = table.filter(pc.is_in(pc.utf8_trim_whitespace(table['DealerID']), value_set=wanted))
+    # Match the universal-newline translation the stdlib reader gets from open()
+    columns = [
+        pc.replace_substring(pc.replace_substring(column, '\r\n', '\n'), '\r', '\n')
+        for column in table.columns
+    ]
+    return pa.Table.from_arrays(columns, names=table.column_names).to_pylist()
+
+
+def _read_rows_polars(csv_file, dealer_ids=None):
+    """Read inventory rows with polars' multithreaded CSV parser"""
+    import polars as pl
+
+    frame = pl.read_csv(csv_file, infer_schema=False)
+    # polars returns blank lines as all-null rows; the csv module skips them
+    frame = frame.filter(~pl.all_horizontal(pl.all().is_null()))
+    if dealer_ids:
+        frame = frame.filter(pl.col('DealerID').str.strip_chars().is_in(sorted(source_dealer_ids(dealer_ids))))
+    frame = frame.with_columns(
+        pl.all()
+        .fill_null('')
+        .str.replace_all('\r\n', '\n', literal=True)
+        .str.replace_all('\r', '\n', literal=True)
+    )
+    return frame.to_dicts()
+
+
+def _read_header(csv_file):
+    """Read the CSV header row"""
+    with open(csv_file, 'r', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+
+# In 'auto' order: polars measured fastest on Vincue exports, then pyarrow
+CSV_READERS = {
+    'polars': _read_rows_polars,
+    'pyarrow': _read_rows_pyarrow,
+    'stdlib': _read_rows_stdlib,
+}
+
+
+def _csv_backend_available(name):
+    """Check whether a CSV backend's library can be imported"""
+    if name == 'stdlib':
+        return True
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def read_inventory_rows(csv_file, backend=None, dealer_ids=None):
+    """Read the inventory CSV as column -> string dicts
+
+    All backends return the same records. Native parsers fall back to the
+    stdlib reader on files they reject (e.g. rows with extra fields). With
+    ``dealer_ids``, only those dealerships' rows are returned; the filter
+    runs before rows are turned into dicts.
+    """
+    backend = backend or CSV_BACKEND
+    if backend == 'auto':
+        backend = next(name for name in CSV_READERS if _csv_backend_available(name))
+
+    if backend != 'stdlib':
+        try:
+            return CSV_READERS[backend](csv_file, dealer_ids)
+        except ImportError:
+            raise RuntimeError(f"CSV_BACKEND={backend} but {backend} is not installed")
+        except Exception as e:
+            print(f"  {backend} could not parse {csv_file} ({e}); falling back to csv module")
+    return _read_rows_stdlib(csv_file, dealer_ids)
+
+
+# Spill buffered rows to per-dealer files past this many MB (0 keeps everything in memory)
+SPILL_THRESHOLD_MB = float(os.environ.get('SPILL_THRESHOLD_MB', '0'))
+
+# Rough per-field cost of a row dict on top of its string lengths
+ROW_FIELD_OVERHEAD_BYTES = 80
+
+
+class DealerPartitions:
+    """Inventory rows split by dealership, spilled to disk above a memory threshold
+
+    Once buffered rows pass ``threshold_bytes`` every dealer's buffer is
+    appended to its own spill file as a pickled batch. Loading a dealer reads
+    its batches back followed by the rows still buffered, so CSV order is
+    kept and only one dealer's rows need to be in memory while rendering.
+    """
+
+    def __init__(self, dealer_ids, threshold_bytes=None):
+        self.buffers = {dealer_id: [] for dealer_id in dealer_ids}
+        self.row_counts = dict.fromkeys(dealer_ids, 0)
+        self.threshold_bytes = threshold_bytes
+        self.buffered_bytes = 0
+        self.spill_dir = None
+        self.spill_files = {}
+        self.spills = 0
+        # Exports the rows came from, for run reports (see process_inventory_files)
+        self.sources = []
+
+    def add(self, dealer_id, row):
+        self.buffers[dealer_id].append(row)
+        self.row_counts[dealer_id] += 1
+        if self.threshold_bytes:
+            self.buffered_bytes += sum(map(len, filter(None, row.values()))) + ROW_FIELD_OVERHEAD_BYTES * len(row)
+            if self.buffered_bytes >= self.threshold_bytes:
+                self.spill()
+
+    def spill(self):
+        """Append every dealer's buffered rows to its spill file"""
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='feed-partitions-')
+        for dealer_id, rows in self.buffers.items():
+            if not rows:
+                continue
+            path = self.spill_files.setdefault(dealer_id, os.path.join(self.spill_dir, f"{dealer_id}.pickle"))
+            with open(path, 'ab') as f:
+                pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self.buffers[dealer_id] = []
+        self.buffered_bytes = 0
+        self.spills += 1
+
+    def load(self, dealer_id):
+        """Return all rows for one dealer in CSV order"""
+        rows = []
+        path = self.spill_files.get(dealer_id)
+        if path:
+            with open(path, 'rb') as f:
+                while True:
+                    try:
+                        rows.extend(pickle.load(f))
+                    except EOFError:
+                        break
+        rows.extend(self.buffers[dealer_id])
+        return rows
+
+    def counts(self):
+        """Row count per dealer, without loading any partition"""
+        return dict(self.row_counts)
+
+    def items(self):
+        """Yield (dealer_id, rows), loading one partition at a time"""
+        for dealer_id in self.row_counts:
+            yield dealer_id, self.load(dealer_id)
+
+    def __getitem__(self, dealer_id):
+        return self.load(dealer_id)
+
+    def __len__(self):
+        return len(self.row_counts)
+
+    def close(self):
+        """Remove the spill files"""
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+            self.spill_files = {}
+
+
+def new_dealer_partitions(dealer_ids=None):
+    """Create the per-dealer row store for one run"""
+    threshold_bytes = int(SPILL_THRESHOLD_MB * 1024 * 1024) or None
+    return DealerPartitions(dealer_ids or DEALERSHIPS.keys(), threshold_bytes)
+
+
+# Parallel chunked parsing: worker processes for the mmap'd CSV (0 or 1 disables)
+PARSE_WORKERS = int(os.environ.get('PARSE_WORKERS', '0'))
+
+# Files smaller than this are parsed in-process; pool start-up would dominate
+PARALLEL_PARSE_MIN_BYTES = 4 * 1024 * 1024
+
+UTF8_BOM = b'\xef\xbb\xbf'
+
+
+def resolve_dealer_id(row):
+    """Return the configured dealer ID for an inventory row"""
+    dealer_id = row.get('DealerID', '').strip()
+    return DEALER_ID_ALIASES.get(dealer_id, dealer_id)
+
+
+def _next_record_end(mm, pos, quotes):
+    """Find the first newline at or after ``pos`` that is outside a quoted field
+
+    ``quotes`` is the number of quote bytes before ``pos``; a newline ends a
+    record only when that count is even (escaped "" quotes keep the parity).
+    This assumes RFC 4180 quoting, i.e. any field containing a quote is quoted.
+    Returns (offset just past the newline, quote count there), or
+    (None, quotes) at end of file.
+    """
+    while True:
+        newline = mm.find(b'\n', pos)
+        if newline == -1:
+            return None, quotes
+        quotes += mm[pos:newline].count(b'"')
+        if quotes % 2 == 0:
+            return newline + 1, quotes
+        pos = newline + 1
+
+
+def split_csv_records(mm, start, parts):
+    """Split mm[start:] into up to ``parts`` byte ranges that begin and end on record boundaries"""
+    size = len(mm)
+    boundaries = [start]
+    pos = start
+    quotes = 0
+
+    for i in range(1, parts):
+        target = start + (size - start) * i // parts
+        if target <= pos:
+            continue
+        quotes += mm[pos:target].count(b'"')
+        pos, quotes = _next_record_end(mm, target, quotes)
+        if pos is None or pos >= size:
+            break
+        boundaries.append(pos)
+
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _row_dict(fieldnames, values):
+    """Build a row dict exactly as csv.DictReader(restval='') would"""
+    row = dict(zip(fieldnames, values))
+    if len(values) > len(fieldnames):
+        row[None] = values[len(fieldnames):]
+    elif len(values) < len(fieldnames):
+        for name in fieldnames[len(values):]:
+            row[name] = ''
+    return row
+
+
+def _parse_csv_chunk(csv_file, start, end, fieldnames, dealer_ids=None):
+    """Parse one byte range of the CSV and route its rows to dealerships
+
+    Runs in a worker process. Returns ({dealer_id: value lists}, [(dealer_id, key)]);
+    rows travel back as plain lists, which pickle far smaller than dicts,
+    and unknown-dealer rows are reduced to what the skip report needs.
+    With ``dealer_ids``, other rows are dropped on their raw DealerID.
+    """
+    with open(csv_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            text = mm[start:end].decode('utf-8')
+
+    # Same universal-newline translation open() applies in the sequential path
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+
+    wanted = source_dealer_ids(dealer_ids) if dealer_ids else None
+    column = fieldnames.index('DealerID') if 'DealerID' in fieldnames else len(fieldnames)
+
+    routed = {}
+    unknown = []
+    for values in csv.reader(io.StringIO(text)):
+        if not values:
+            continue  # DictReader skips blank lines
+        if wanted is not None:
+            raw_id = values[column].strip() if column < len(values) else ''
+            if raw_id in wanted:
+                routed.setdefault(DEALER_ID_ALIASES.get(raw_id, raw_id), []).append(values)
+            continue
+        row = _row_dict(fieldnames, values)
+        dealer_id = resolve_dealer_id(row)
+        if dealer_id in DEALERSHIPS:
+            routed.setdefault(dealer_id, []).append(values)
+        else:
+            unknown.append((dealer_id, skip_key(row)))
+    return routed, unknown
+
+
+def process_inventory_parallel(csv_file, stats=None, workers=None, dealer_ids=None):
+    """Process inventory by parsing record-aligned chunks of the mmap'd CSV in a process pool
+
+    Per-dealer lists are merged in chunk order, so rows keep their original
+    order and feeds match the sequential path.
+    """
+    workers = workers or os.cpu_count() or 1
+
+    with open(csv_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data_start = len(UTF8_BOM) if mm[:len(UTF8_BOM)] == UTF8_BOM else 0
+            header_end, _ = _next_record_end(mm, data_start, 0)
+            if header_end is None:
+                header_end = len(mm)
+            header_text = mm[data_start:header_end].decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+            fieldnames = next(csv.reader(io.StringIO(header_text)), [])
+            # A few chunks per worker keeps the pool busy when rows vary in size
+            chunks = split_csv_records(mm, header_end, workers * 4)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    dealership_vehicles = new_dealer_partitions(dealer_ids)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _parse_csv_chunk,
+            *zip(*[(csv_file, start, end, fieldnames, dealer_ids) for start, end in chunks if end > start])
+        )
+        for routed, unknown in results:
+            for dealer_id, rows in routed.items():
+                for values in rows:
+                    dealership_vehicles.add(dealer_id, _row_dict(fieldnames, values))
+            if stats:
+                for dealer_id, key in unknown:
+                    stats.record('skipped', 'inventory', dealer_id, 'unknown_dealer', key)
+
+    return dealership_vehicles
+
+
+def process_inventory(csv_file, stats=None, backend=None, dealer_ids=None):
+    """Process inventory and split by dealership
+
+    Returns a ``DealerPartitions``; with SPILL_THRESHOLD_MB set, rows are
+    streamed with the csv module (unless a backend is forced) so memory stays
+    bounded while partitioning. ``dealer_ids`` limits the run to those
+    dealerships; rows for any other dealer, including unknown ones, are
+    dropped while parsing and not counted as skipped.
+    """
+    if PARSE_WORKERS > 1 and os.path.getsize(csv_file) >= PARALLEL_PARSE_MIN_BYTES:
+        return process_inventory_parallel(csv_file, stats, PARSE_WORKERS, dealer_ids)
+
+    if SPILL_THRESHOLD_MB and (backend or CSV_BACKEND) == 'auto':
+        # The native backends materialize the whole file before returning rows
+        backend = 'stdlib'
+
+    dealership_vehicles = new_dealer_partitions(dealer_ids)
+    
+    for row in read_inventory_rows(csv_file, backend, dealer_ids):
+        dealer_id = resolve_dealer_id(row)
+        if dealer_id in dealership_vehicles.row_counts:
+            dealership_vehicles.add(dealer_id, row)
+        elif stats:
+            stats.record('skipped', 'inventory', dealer_id, 'unknown_dealer', skip_key(row))
+    
+    return dealership_vehicles
+
+
+# Which copy wins when a VIN is in several exports: 'newest_file', or
+# 'number_of_days' (most days on lot, i.e. the latest snapshot; newest file on ties)
+INVENTORY_DEDUPE_RULE = os.environ.get('INVENTORY_DEDUPE_RULE', 'newest_file')
+DEDUPE_RULES = ('newest_file', 'number_of_days')
+
+
+def _source_report(file, rows, duplicates=()):
+    """Run report entry for one export"""
+    return {
+        'name': file['name'],
+        'size': file['size'],
+        'modified': datetime.fromtimestamp(file['mtime']).isoformat() if file.get('mtime') else None,
+        'rows': rows,
+        'duplicates_dropped': len(duplicates),
+        'sample_duplicates': list(duplicates[:5])
+    }
+
+
+def process_inventory_files(files, stats=None, backend=None, dealer_ids=None, dedupe=None):
+    """Process one or more downloaded exports into one set of dealer partitions
+
+    ``files`` are {'name', 'size', 'mtime', 'path'} dicts, newest first, as
+    returned by ``sftp.download_inventory_files``. A single export goes
+    through ``process_inventory`` unchanged. Several are parsed concurrently
+    and merged in that order; a VIN found in more than one export is kept
+    only from the file chosen by ``dedupe`` (INVENTORY_DEDUPE_RULE).
+    Duplicates within one export are left alone, as in a single-file run.
+    The files used and duplicates dropped are listed in ``sources``.
+    """
+    dedupe = dedupe or INVENTORY_DEDUPE_RULE
+    if dedupe not in DEDUPE_RULES:
+        raise ValueError(f"Unknown dedupe rule: {dedupe} (expected {', '.join(DEDUPE_RULES)})")
+
+    if len(files) == 1:
+        dealership_vehicles = process_inventory(files[0]['path'], stats, backend, dealer_ids)
+        dealership_vehicles.sources = [_source_report(files[0], sum(dealership_vehicles.row_counts.values()))]
+        return dealership_vehicles
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    # pyarrow and polars release the GIL while parsing; the csv module mostly overlaps I/O.
+    # Rows are read twice below, so the stdlib reader's generator is materialized here
+    with ThreadPoolExecutor(max_workers=len(files), thread_name_prefix='csv-parse') as pool:
+        parsed = list(pool.map(lambda file: list(read_inventory_rows(file['path'], backend, dealer_ids)), files))
+
+    # Pick the winning export for every VIN before routing any rows
+    winners = {}
+    for index, rows in enumerate(parsed):
+        for row in rows:
+            vin = (row.get('VIN') or '').strip().upper()
+            if not vin:
+                continue
+            if dedupe == 'number_of_days':
+                days, _ = parse_days_on_lot(row.get('NumberOfDays'))
+                rank = (days if days is not None else -1, -index)
+            else:
+                rank = (-index,)
+            if vin not in winners or rank > winners[vin][0]:
+                winners[vin] = (rank, index)
+
+    dealership_vehicles = new_dealer_partitions(dealer_ids)
+    for index, (file, rows) in enumerate(zip(files, parsed)):
+        duplicates = []
+        used = 0
+        for row in rows:
+            vin = (row.get('VIN') or '').strip().upper()
+            if vin and winners[vin][1] != index:
+                duplicates.append(vin)
+                continue
+            dealer_id = resolve_dealer_id(row)
+            if dealer_id in dealership_vehicles.row_counts:
+                dealership_vehicles.add(dealer_id, row)
+                used += 1
+            elif stats:
+                stats.record('skipped', 'inventory', dealer_id, 'unknown_dealer', skip_key(row))
+        dealership_vehicles.sources.append(_source_report(file, used, duplicates))
+        parsed[index] = None
+
+    return dealership_vehicles
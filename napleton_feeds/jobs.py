@@ -0,0 +1,137 @@
+"""
+In-process job store for background feed generation
+"""
+
+import threading
+import traceback
+import uuid
+from datetime import datetime
+
+from . import renderers  # noqa: F401 - registers the targets default_platforms() reads
+from .targets import default_platforms
+
+
+def _includes(scope, requested):
+    """Whether a scope (None meaning everything) includes the requested values"""
+    return scope is None or (requested is not None and set(requested) <= set(scope))
+
+
+class GenerationJob:
+    """One background generation run and its per-feed progress
+
+    ``feeds`` maps a feed file name to its dealer, platform, state
+    ('pending', 'rendering', 'uploading', 'done', 'failed' or 'carried_over')
+    and URL.
+    """
+
+    def __init__(self, dealer_ids=None, platforms=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.dealer_ids = dealer_ids
+        self.platforms = platforms
+        self.status = 'queued'
+        self.phase = None
+        self.created_at = datetime.now().isoformat()
+        self.started_at = None
+        self.finished_at = None
+        self.feeds = {}
+        self.result = None
+        self.error = None
+        self.lock = threading.Lock()
+
+    def covers(self, dealer_ids, platforms):
+        """Whether this job's scope includes the requested dealers and platforms"""
+        return _includes(self.dealer_ids, dealer_ids) and _includes(self.platforms, platforms)
+
+    @property
+    def active(self):
+        return self.status in ('queued', 'running')
+
+    def set_phase(self, phase):
+        with self.lock:
+            self.phase = phase
+
+    def add_feed(self, filename, dealer_id, platform):
+        with self.lock:
+            self.feeds[filename] = {'dealer_id': dealer_id, 'platform': platform, 'state': 'pending', 'url': None}
+
+    def update_feed(self, filename, state, url=None):
+        with self.lock:
+            self.feeds[filename]['state'] = state
+            if url is not None:
+                self.feeds[filename]['url'] = url
+
+    def to_dict(self):
+        with self.lock:
+            states = [feed['state'] for feed in self.feeds.values()]
+            return {
+                'job_id': self.id,
+                'status': self.status,
+                'phase': self.phase,
+                'dealers': self.dealer_ids or 'all',
+                'platforms': self.platforms or 'all',
+                'created_at': self.created_at,
+                'started_at': self.started_at,
+                'finished_at': self.finished_at,
+                'progress': {
+                    'done': states.count('done'),
+                    'failed': states.count('failed'),
+                    'total': len(states)
+                },
+                'feeds': {filename: dict(feed) for filename, feed in self.feeds.items()},
+                'result': self.result,
+                'error': self.error
+            }
+
+
+class JobStore:
+    """Jobs of this instance, with duplicate triggers single-flighted onto a running job
+
+    Only the last ``max_finished`` finished jobs are kept for status lookups.
+    """
+
+    def __init__(self, max_finished=20):
+        self.jobs = {}
+        self.max_finished = max_finished
+        self.lock = threading.Lock()
+
+    def submit(self, run, dealer_ids=None, platforms=None):
+        """Start ``run(job)`` in a background thread, or return the active job that already covers it
+
+        Returns (job, created). No platforms means the default targets, not
+        every registered one, so an opt-in target is never folded into a
+        default run.
+        """
+        platforms = platforms or default_platforms()
+        with self.lock:
+            for job in self.jobs.values():
+                if job.active and job.covers(dealer_ids, platforms):
+                    return job, False
+
+            job = GenerationJob(dealer_ids, platforms)
+            self.jobs[job.id] = job
+            self._prune()
+
+        threading.Thread(target=self._run, args=(job, run), name=f"feed-job-{job.id}", daemon=True).start()
+        return job, True
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, run):
+        with job.lock:
+            job.status = 'running'
+            job.started_at = datetime.now().isoformat()
+        try:
+            result, error, status = run(job), None, 'succeeded'
+        except Exception as e:
+            traceback.print_exc()
+            result, error, status = None, str(e), 'failed'
+        with job.lock:
+            job.result, job.error, job.status = result, error, status
+            job.finished_at = datetime.now().isoformat()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self.jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self.jobs[job_id]
@@ -0,0 +1,88 @@
+"""
+Vehicle lookup in generated feeds through their sidecar indexes
+"""
+
+import glob
+import json
+import mmap
+import os
+
+from .config import FEED_DIR
+from .feed_index import INDEX_SUFFIX
+
+# Indexes stay loaded across warm invocations; reloaded when the file changes
+_INDEX_CACHE = {}
+
+
+def _load_index(index_path):
+    """Load a sidecar index, reusing the cached copy if unchanged"""
+    mtime = os.path.getmtime(index_path)
+    cached = _INDEX_CACHE.get(index_path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index = json.load(f)
+    _INDEX_CACHE[index_path] = (mtime, index)
+    return index
+
+
+def _normalize_dealer(value):
+    """Normalize a dealer name or file prefix for loose matching"""
+    return value.lower().replace('_', ' ').strip()
+
+
+def read_fragment(feed_path, offset, length, expected_size):
+    """Read one vehicle's item (XML element or catalog line) from a feed via mmap"""
+    with open(feed_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if len(mm) != expected_size:
+                raise ValueError(f"index is stale for {os.path.basename(feed_path)} "
+                                 f"(feed is {len(mm)} bytes, index expects {expected_size})")
+            return mm[offset:offset + length].decode('utf-8')
+
+
+def lookup_vehicle(key, feed_dir=FEED_DIR, dealer=None, platform=None):
+    """Find a vehicle across all feed indexes, including feeds that skipped it"""
+    key = key.strip()
+    vin_key = key.upper()
+    results = []
+
+    for index_path in sorted(glob.glob(os.path.join(feed_dir, f"*{INDEX_SUFFIX}"))):
+        index = _load_index(index_path)
+
+        if platform and index['platform'] != platform:
+            continue
+        if dealer and dealer != index['dealer_id'] and \
+                _normalize_dealer(dealer) not in _normalize_dealer(index['feed']):
+            continue
+
+        result = {
+            'feed': index['feed'],
+            'platform': index['platform'],
+            'dealer_id': index['dealer_id'],
+            'generated_at': index['generated_at']
+        }
+
+        vin = vin_key if vin_key in index['vehicles'] else index['stock_numbers'].get(key)
+        if vin:
+            offset, length = index['vehicles'][vin]
+            feed_path = os.path.join(feed_dir, index['feed'])
+            result.update({
+                'status': 'listed',
+                'vin': vin,
+                'offset': offset,
+                'length': length,
+                'fragment': read_fragment(feed_path, offset, length, index['size'])
+            })
+            results.append(result)
+        elif vin_key in index['skipped'] or f"stock:{key}" in index['skipped']:
+            # Vehicles skipped for a missing VIN are recorded by stock number
+            skip_key = vin_key if vin_key in index['skipped'] else f"stock:{key}"
+            result.update({
+                'status': 'skipped',
+                'vin': vin_key if skip_key == vin_key else None,
+                'reason': index['skipped'][skip_key]
+            })
+            results.append(result)
+
+    return results
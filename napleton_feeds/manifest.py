@@ -0,0 +1,89 @@
+"""
+Manifest of the generated feeds, built from their sidecar indexes
+"""
+
+import json
+import os
+from datetime import datetime
+
+from .config import DEALERSHIPS, FEED_BASE_URL
+from .feed_index import build_feed_index, feed_digest, gzip_feed, index_filename, publish_file
+from .renderers import feed_filename
+from .targets import platform_for_file
+
+# Written into the feed directory alongside the feeds
+MANIFEST_FILE = 'manifest.json'
+
+
+def _feed_dealer_id(name, platform):
+    """Dealer ID for a feed file name, or None if no dealership produces it"""
+    for dealer_id, dealership in DEALERSHIPS.items():
+        if feed_filename(dealership, platform) == name:
+            return dealer_id
+    return None
+
+
+def _manifest_entry(feed_dir, name, index, base_url):
+    """Manifest entry for one feed, from its index or (without one) the feed itself"""
+    feed_path = os.path.join(feed_dir, name)
+    if index and index.get('hash') and index.get('gzip_size') is not None:
+        size, gzip_size, digest = index['size'], index['gzip_size'], index['hash']
+        vehicle_count, skip_count = len(index['vehicles']), len(index['skipped'])
+        platform, dealer_id, generated_at = index['platform'], index['dealer_id'], index['generated_at']
+    else:
+        # Feeds written before indexes recorded hashes (or had indexes at all)
+        with open(feed_path, 'rb') as f:
+            feed_bytes = f.read()
+        size, gzip_size, digest = len(feed_bytes), len(gzip_feed(feed_bytes)), feed_digest(feed_bytes)
+        platform = platform_for_file(name)
+        vehicles, _ = build_feed_index(feed_bytes, platform)
+        vehicle_count = len(vehicles)
+        skip_count = len(index['skipped']) if index else None
+        dealer_id = index['dealer_id'] if index else _feed_dealer_id(name, platform)
+        generated_at = index['generated_at'] if index else \
+            datetime.fromtimestamp(os.path.getmtime(feed_path)).isoformat()
+
+    return {
+        'name': name,
+        'url': f"{base_url}/{name}",
+        'dealer_id': dealer_id,
+        'dealership': DEALERSHIPS[dealer_id]['name'] if dealer_id in DEALERSHIPS else None,
+        'platform': platform,
+        'size': size,
+        'gzip_size': gzip_size,
+        'hash': digest,
+        'vehicle_count': vehicle_count,
+        'skip_count': skip_count,
+        'generated_at': generated_at
+    }
+
+
+def build_manifest(feed_dir, base_url=None):
+    """Describe every feed in feed_dir"""
+    base_url = (base_url or FEED_BASE_URL).rstrip('/')
+    feeds = []
+    for name in sorted(os.listdir(feed_dir)):
+        if platform_for_file(name) is None:
+            continue
+        index = None
+        index_path = os.path.join(feed_dir, index_filename(name))
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+        feeds.append(_manifest_entry(feed_dir, name, index, base_url))
+
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'base_url': base_url,
+        'total_feeds': len(feeds),
+        'total_vehicles': sum(feed['vehicle_count'] for feed in feeds),
+        'feeds': feeds
+    }
+
+
+def write_manifest(feed_dir, base_url=None):
+    """Write MANIFEST_FILE into feed_dir; returns its path"""
+    manifest = build_manifest(feed_dir, base_url)
+    path = os.path.join(feed_dir, MANIFEST_FILE)
+    publish_file(path, json.dumps(manifest, indent=1).encode('utf-8'))
+    return path
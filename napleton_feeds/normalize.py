@@ -0,0 +1,464 @@
+"""
+Field parsing, mapping and column-wise normalization of inventory rows
+"""
+
+import os
+from functools import lru_cache
+from urllib.parse import parse_qsl, quote, urlencode, urlparse, urlunparse
+
+
+def clean_price(price_str):
+    """Clean and format price value"""
+    if not price_str or price_str == '0.00' or price_str == '0':
+        return None
+    try:
+        return float(price_str.replace(',', ''))
+    except:
+        return None
+
+
+# Distinct PhotoURL strings (galleries) whose parsed lists and image blocks are kept
+PHOTO_CACHE_SIZE = int(os.environ.get('PHOTO_CACHE_SIZE', '50000'))
+
+
+@lru_cache(maxsize=PHOTO_CACHE_SIZE)
+def parse_photos(photo_url_string):
+    """Parse pipe-separated photo URLs into a tuple, shared by every feed of the vehicle
+
+    Cached by the PhotoURL string, so a gallery seen before (e.g. on the
+    previous watch poll) is not split again.
+    """
+    if not photo_url_string:
+        return ()
+    return tuple(url.strip() for url in photo_url_string.split('|') if url.strip())
+
+
+def map_body_style(body_style_value):
+    """Map CSV body style values to Google VLA accepted body_style attribute values"""
+    if not body_style_value:
+        return None
+    
+    # Normalize input - lowercase and remove extra spaces
+    normalized = body_style_value.lower().strip()
+    
+    # Mapping dictionary - maps common variations to Google's accepted values
+    body_style_mapping = {
+        # SUVs and Crossovers
+        'suv': 'suv',
+        'sport utility': 'suv',
+        'sport utility vehicle': 'suv',
+        'crossover': 'crossover',
+        'compact suv': 'compact_suv',
+        'compact crossover': 'compact_suv',
+        'small suv': 'compact_suv',
+        
+        # Sedans and Cars
+        'sedan': 'sedan',
+        '4dr sedan': 'sedan',
+        '2dr sedan': 'sedan',
+        'city car': 'city_car',
+        'coupe': 'coupe',
+        '2dr coupe': 'coupe',
+        'hatchback': 'hatchback',
+        'hatch': 'hatchback',
+        
+        # Wagons
+        'wagon': 'station wagon',
+        'station wagon': 'station wagon',
+        'estate': 'station wagon',
+        
+        # Convertibles
+        'convertible': 'convertible',
+        'cabriolet': 'convertible',
+        'roadster': 'convertible',
+        
+        # Trucks
+        'truck': 'truck',
+        'pickup': 'truck',
+        'pickup truck': 'truck',
+        'crew cab': 'truck',
+        'extended cab': 'truck',
+        'regular cab': 'truck',
+        'double cab': 'truck',
+        'quad cab': 'truck',
+        'supercab': 'truck',
+        'supercrew': 'truck',
+        
+        # Vans
+        'van': 'full size van',
+        'cargo van': 'full size van',
+        'passenger van': 'full size van',
+        'full size van': 'full size van',
+        'minivan': 'minivan',
+        'mini van': 'minivan',
+        'mini-van': 'minivan',
+        
+        # RVs and Campers
+        'class a motorhome': 'class_a_motorhome',
+        'class b motorhome': 'class_b_motorhome',
+        'class c motorhome': 'class_c_motorhome',
+        'motorhome': 'class_a_motorhome',  # Default to Class A
+        'travel trailer': 'travel_trailer',
+        'fifth wheel': 'fifth_wheel',
+        '5th wheel': 'fifth_wheel',
+        'pop up camper': 'pop_up_camper',
+        'pop-up camper': 'pop_up_camper',
+        'truck camper': 'truck_camper',
+    }
+    
+    # Try direct match first
+    if normalized in body_style_mapping:
+        return body_style_mapping[normalized]
+    
+    # Try partial matching for common patterns
+    if 'suv' in normalized or 'utility' in normalized:
+        if 'compact' in normalized or 'small' in normalized:
+            return 'compact_suv'
+        return 'suv'
+    
+    if 'truck' in normalized or 'pickup' in normalized:
+        return 'truck'
+    
+    if 'van' in normalized:
+        if 'mini' in normalized:
+            return 'minivan'
+        return 'full size van'
+    
+    if 'sedan' in normalized:
+        return 'sedan'
+    
+    if 'coupe' in normalized:
+        return 'coupe'
+    
+    if 'convertible' in normalized or 'cabrio' in normalized:
+        return 'convertible'
+    
+    if 'wagon' in normalized or 'estate' in normalized:
+        return 'station wagon'
+    
+    if 'hatch' in normalized:
+        return 'hatchback'
+    
+    if 'crossover' in normalized:
+        return 'crossover'
+    
+    # If no match found, return None (don't include invalid body_style)
+    return None
+
+
+def ensure_store_placeholder(url):
+    """Ensure the provided URL contains a store placeholder query parameter."""
+    if not url:
+        return url
+
+    placeholder = '{store_code}'
+    parsed = urlparse(url)
+    query_items = parse_qsl(parsed.query, keep_blank_values=True)
+
+    store_present = False
+    normalized_items = []
+    for key, value in query_items:
+        if key == 'store':
+            store_present = True
+            normalized_items.append((key, placeholder))
+        else:
+            normalized_items.append((key, value))
+
+    # Always add store parameter if not present
+    if not store_present:
+        normalized_items.append(('store', placeholder))
+
+    def quote_with_braces(string, safe, encoding, errors):
+        return quote(string, safe + '{}', encoding, errors)
+
+    # Build the query string
+    new_query = urlencode(normalized_items, doseq=True, quote_via=quote_with_braces)
+    
+    # Reconstruct URL with new query string
+    result_url = urlunparse(parsed._replace(query=new_query))
+    
+    # Google VLA requires trailing & for link_template
+    if new_query and not result_url.endswith('&'):
+        result_url += '&'
+    
+    return result_url
+
+
+def map_body_style_facebook(body_style_value):
+    """Map body style to Facebook's accepted values"""
+    if not body_style_value:
+        return 'OTHER'
+
+    normalized = body_style_value.lower().strip()
+
+    # Facebook's accepted values
+    fb_mapping = {
+        'convertible': 'CONVERTIBLE',
+        'cabriolet': 'CONVERTIBLE',
+        'roadster': 'ROADSTER',
+        'coupe': 'COUPE',
+        '2dr coupe': 'COUPE',
+        'crossover': 'CROSSOVER',
+        'estate': 'ESTATE',
+        'wagon': 'WAGON',
+        'station wagon': 'WAGON',
+        'hatchback': 'HATCHBACK',
+        'hatch': 'HATCHBACK',
+        'minibus': 'MINIBUS',
+        'minivan': 'MINIVAN',
+        'mini van': 'MINIVAN',
+        'mpv': 'MPV',
+        'pickup': 'PICKUP',
+        'truck': 'TRUCK',
+        'sedan': 'SEDAN',
+        'saloon': 'SALOON',
+        '4dr sedan': 'SEDAN',
+        'small car': 'SMALL_CAR',
+        'city car': 'SMALL_CAR',
+        'sportscar': 'SPORTSCAR',
+        'supercar': 'SUPERCAR',
+        'supermini': 'SUPERMINI',
+        'suv': 'SUV',
+        'sport utility': 'SUV',
+        'van': 'VAN',
+        'cargo van': 'VAN',
+    }
+
+    # Try direct match
+    if normalized in fb_mapping:
+        return fb_mapping[normalized]
+
+    # Try partial matching
+    if 'convertible' in normalized or 'cabrio' in normalized:
+        return 'CONVERTIBLE'
+    if 'coupe' in normalized:
+        return 'COUPE'
+    if 'crossover' in normalized:
+        return 'CROSSOVER'
+    if 'wagon' in normalized or 'estate' in normalized:
+        return 'WAGON'
+    if 'hatch' in normalized:
+        return 'HATCHBACK'
+    if 'mini' in normalized and 'van' in normalized:
+        return 'MINIVAN'
+    if 'truck' in normalized or 'pickup' in normalized:
+        return 'TRUCK'
+    if 'sedan' in normalized or 'saloon' in normalized:
+        return 'SEDAN'
+    if 'suv' in normalized or 'utility' in normalized:
+        return 'SUV'
+    if 'van' in normalized:
+        return 'VAN'
+    if 'sport' in normalized:
+        return 'SPORTSCAR'
+
+    return 'OTHER'
+
+
+def parse_mileage(miles_value):
+    """Parse a raw Miles value into (mileage, bad_value)"""
+    if not miles_value:
+        return None, False
+    try:
+        return int(float(miles_value)), False
+    except:
+        return None, True
+
+
+def parse_days_on_lot(days_value):
+    """Parse a raw NumberOfDays value into (days_on_lot, bad_value)"""
+    if not days_value:
+        return None, False
+    try:
+        return int(days_value.strip()), False
+    except:
+        return None, True
+
+
+# Age categories for campaign rules: New (0-7), Fresh (8-30), Aged (31-60), Stale (60+)
+AGE_BUCKET_LIMITS = (7, 30, 60)
+AGE_BUCKET_NAMES = ('NEW', 'FRESH', 'AGED', 'STALE')
+
+
+def age_label(days_on_lot):
+    """Build the custom_label_1 value for a days-on-lot count"""
+    for limit, name in zip(AGE_BUCKET_LIMITS, AGE_BUCKET_NAMES):
+        if days_on_lot <= limit:
+            return f"{name}_{days_on_lot}d"
+    return f"{AGE_BUCKET_NAMES[-1]}_{days_on_lot}d"
+
+
+# Normalization backend: 'numpy', 'python', or 'auto' (numpy when installed)
+NORMALIZE_BACKEND = os.environ.get('NORMALIZE_BACKEND', 'auto')
+
+_numpy_module = None
+
+
+def _load_numpy():
+    """Import numpy on first use; returns None when it is not installed"""
+    global _numpy_module
+    if _numpy_module is None:
+        try:
+            import numpy
+            _numpy_module = numpy
+        except ImportError:
+            _numpy_module = False
+    return _numpy_module or None
+
+
+def _normalize_columns_python(vehicles):
+    """Row-at-a-time normalization; the reference the numpy path must match"""
+    columns = {name: [] for name in ('price', 'msrp', 'miles', 'miles_bad', 'days', 'days_bad', 'age_label')}
+    for vehicle in vehicles:
+        columns['price'].append(clean_price(vehicle.get('PRICE')))
+        columns['msrp'].append(clean_price(vehicle.get('MSRP')))
+
+        mileage, miles_bad = parse_mileage(vehicle.get('Miles'))
+        columns['miles'].append(mileage)
+        columns['miles_bad'].append(miles_bad)
+
+        days_on_lot, days_bad = parse_days_on_lot(vehicle.get('NumberOfDays'))
+        columns['days'].append(days_on_lot)
+        columns['days_bad'].append(days_bad)
+        columns['age_label'].append(age_label(days_on_lot) if days_on_lot is not None else None)
+    return columns
+
+
+def _convert_column(raw, indices, fast, convert):
+    """Convert the values at ``indices`` in one ``map(fast, ...)`` pass
+
+    ``fast`` must agree with ``convert`` wherever it succeeds; on the first
+    failure the column is redone per element with ``convert``. Returns
+    (converted indices, values).
+    """
+    values = [raw[i] for i in indices]
+    try:
+        return indices, list(map(fast, values))
+    except:
+        converted_indices = []
+        converted = []
+        for i, value in zip(indices, values):
+            try:
+                converted.append(convert(value))
+                converted_indices.append(i)
+            except:
+                pass
+        return converted_indices, converted
+
+
+def _normalize_columns_numpy(np, vehicles):
+    """Columnar normalization of price, MSRP, mileage and days-on-lot
+
+    Each column is projected once and converted in a single pass; masking,
+    truncation and age bucketing then run as numpy array operations.
+    """
+    count = len(vehicles)
+    columns = {}
+
+    for field, name in (('PRICE', 'price'), ('MSRP', 'msrp')):
+        raw = [vehicle.get(field) for vehicle in vehicles]
+        indices = [i for i, value in enumerate(raw) if value and value != '0.00' and value != '0']
+        indices, parsed = _convert_column(raw, indices, float, lambda value: float(value.replace(',', '')))
+        column = [None] * count
+        for i, value in zip(indices, parsed):
+            column[i] = value
+        columns[name] = column
+
+    # Mileage: int(float(Miles)); non-empty values that don't parse are flagged as bad
+    raw = [vehicle.get('Miles') for vehicle in vehicles]
+    present = [i for i, value in enumerate(raw) if value]
+    indices, parsed = _convert_column(raw, present, float, float)
+    values = np.full(count, np.nan)
+    values[indices] = parsed
+    ok = np.isfinite(values)
+    miles = np.where(ok, np.trunc(values), 0).tolist()
+    miles_bad = np.zeros(count, dtype=bool)
+    miles_bad[present] = True
+    miles_bad &= ~ok
+    columns['miles'] = [int(value) if valid else None for value, valid in zip(miles, ok.tolist())]
+    columns['miles_bad'] = miles_bad.tolist()
+
+    # Days on lot, bucketed with one searchsorted over the bucket limits
+    raw = [vehicle.get('NumberOfDays') for vehicle in vehicles]
+    present = [i for i, value in enumerate(raw) if value]
+    indices, parsed = _convert_column(raw, present, int, lambda value: int(value.strip()))
+    days = [None] * count
+    for i, value in zip(indices, parsed):
+        days[i] = value
+    days_bad = np.zeros(count, dtype=bool)
+    days_bad[present] = True
+    days_bad[indices] = False
+
+    age_labels = [None] * count
+    if indices:
+        try:
+            days_array = np.array(parsed, dtype=np.int64)
+        except OverflowError:
+            days_array = None
+        if days_array is not None:
+            bucket_names = np.array(AGE_BUCKET_NAMES)[np.searchsorted(AGE_BUCKET_LIMITS, days_array, side='left')]
+            for i, name, value in zip(indices, bucket_names.tolist(), parsed):
+                age_labels[i] = f"{name}_{value}d"
+        else:
+            for i, value in zip(indices, parsed):
+                age_labels[i] = age_label(value)
+
+    columns['days'] = days
+    columns['days_bad'] = days_bad.tolist()
+    columns['age_label'] = age_labels
+
+    return columns
+
+
+def normalize_columns(vehicles, backend=None):
+    """Clean price/MSRP, parse mileage and bucket days-on-lot for a list of vehicles
+
+    Returns a dict of per-vehicle lists (``price``, ``msrp``, ``miles``,
+    ``miles_bad``, ``days``, ``days_bad``, ``age_label``) in vehicle order.
+    The numpy and pure-Python backends produce identical results.
+    """
+    backend = backend or NORMALIZE_BACKEND
+    np = _load_numpy() if backend in ('auto', 'numpy') else None
+    if backend == 'numpy' and np is None:
+        raise RuntimeError("NORMALIZE_BACKEND=numpy but numpy is not installed")
+    if np is None or not vehicles:
+        return _normalize_columns_python(vehicles)
+    return _normalize_columns_numpy(np, vehicles)
+
+
+class NormalizedVehicle:
+    """One inventory row with its normalized values, as every feed writer sees it"""
+
+    __slots__ = ('row', 'price', 'msrp', 'miles', 'miles_bad', 'days', 'days_bad', 'age_label',
+                 'price_label', 'photo_url', 'photos')
+
+    def __init__(self, row, price, msrp, miles, miles_bad, days, days_bad, age_label, price_label, photo_url):
+        self.row = row
+        self.price = price
+        self.msrp = msrp
+        self.miles = miles
+        self.miles_bad = miles_bad
+        self.days = days
+        self.days_bad = days_bad
+        self.age_label = age_label
+        self.price_label = price_label
+        # The raw PhotoURL string keys the writers' cached image blocks
+        self.photo_url = photo_url
+        self.photos = parse_photos(photo_url)
+
+
+def normalized_vehicles(vehicles, columns=None):
+    """Yield a NormalizedVehicle per row, normalizing the rows once for all writers
+
+    ``columns`` are precomputed ``normalize_columns`` values for ``vehicles``,
+    optionally with a ``price_label`` column from ``PriceHistory.observe``.
+    """
+    if columns is None:
+        columns = normalize_columns(vehicles)
+    price_labels = columns.get('price_label') or [None] * len(vehicles)
+    for i, row in enumerate(vehicles):
+        yield NormalizedVehicle(
+            row, columns['price'][i], columns['msrp'][i], columns['miles'][i], columns['miles_bad'][i],
+            columns['days'][i], columns['days_bad'][i], columns['age_label'][i], price_labels[i],
+            row.get('PhotoURL') or ''
+        )
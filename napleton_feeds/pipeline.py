@@ -0,0 +1,88 @@
+"""
+Overlapped render and publish stages for scheduled feeds
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .scheduler import FeedRenderer
+
+# Feeds written or uploaded at the same time
+FEED_PUBLISH_CONCURRENCY = int(os.environ.get('FEED_PUBLISH_CONCURRENCY', '4'))
+
+# Rendered feeds allowed to wait for a publisher before rendering pauses
+FEED_QUEUE_SIZE = int(os.environ.get('FEED_QUEUE_SIZE', '2'))
+
+
+async def _render_stage(scheduler, tasks, renderer, queue, executor, on_start, publishers):
+    """Render admitted tasks in priority order onto the bounded queue"""
+    loop = asyncio.get_running_loop()
+    for task in tasks:
+        if not scheduler.admit(task):
+            renderer.skip(task)
+            continue
+        if on_start:
+            on_start(task)
+        start = time.monotonic()
+        rendered = await loop.run_in_executor(executor, renderer.render, task)
+        # Blocks while the queue is full, so at most FEED_QUEUE_SIZE rendered
+        # feeds (plus one per publisher) are held in memory
+        await queue.put((task, rendered, time.monotonic() - start))
+    for _ in range(publishers):
+        await queue.put(None)
+
+
+async def _publish_stage(scheduler, queue, executor, publish):
+    """Publish rendered feeds from the queue until the render stage is done"""
+    loop = asyncio.get_running_loop()
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        task, rendered, render_seconds = item
+        start = time.monotonic()
+        published = await loop.run_in_executor(executor, publish, task, *rendered)
+        if published is False:
+            scheduler.fail(task)
+        else:
+            scheduler.record(task, render_seconds + time.monotonic() - start)
+
+
+async def run_feed_pipeline(scheduler, tasks, dealership_vehicles, stats, publish, fingerprints=None,
+                            on_start=None, concurrency=None, queue_size=None, price_history=None):
+    """Render scheduled feeds while earlier ones are written or uploaded
+
+    ``publish(task, content, feed_stats, row_hashes)`` writes or uploads one
+    rendered feed and returns False if it could not (the feed is then
+    reported as failed, not refreshed); ``on_start(task)`` is called before
+    a feed is rendered.
+    ``price_history`` (a ``PriceHistory``) adds price-drop labels.
+
+    Rendering runs on one worker thread, in priority order. Up to
+    ``concurrency`` ``publish`` calls run at once on their own threads, and a
+    queue of ``queue_size`` rendered feeds between the two stages applies
+    backpressure. ``publish`` must be safe to call from several threads.
+    """
+    concurrency = max(1, concurrency or FEED_PUBLISH_CONCURRENCY)
+    queue = asyncio.Queue(maxsize=max(1, queue_size or FEED_QUEUE_SIZE))
+    renderer = FeedRenderer(dealership_vehicles, stats, fingerprints, tasks, price_history)
+
+    # SkipStats and the renderer's prepared rows are not thread-safe, so a
+    # single render thread; uploads release the GIL while waiting on the network
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-render') as render_executor, \
+            ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='feed-publish') as publish_executor:
+        stages = [asyncio.ensure_future(_render_stage(scheduler, tasks, renderer, queue, render_executor,
+                                                      on_start, concurrency))]
+        stages += [asyncio.ensure_future(_publish_stage(scheduler, queue, publish_executor, publish))
+                   for _ in range(concurrency)]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+
+    return scheduler.report()
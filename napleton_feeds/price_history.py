@@ -0,0 +1,173 @@
+"""
+Append-only price history per dealer and VIN, and price-drop labels
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from .config import split_option_values
+
+# SQLite database kept between runs (committed by the workflow next to feeds/)
+PRICE_HISTORY_DB = os.environ.get('PRICE_HISTORY_DB', os.path.join('history', 'prices.sqlite'))
+
+# Label windows in days: a drop within the smallest matching window is labeled PRICE_DROP_<days>D
+PRICE_DROP_DAYS = sorted(int(days) for days in split_option_values([os.environ.get('PRICE_DROP_DAYS', '7,30')]))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS price_changes (
+    dealer_id TEXT NOT NULL,
+    vin TEXT NOT NULL,
+    observed_at REAL NOT NULL,
+    price REAL
+);
+CREATE INDEX IF NOT EXISTS price_changes_vin ON price_changes (vin, observed_at);
+CREATE TABLE IF NOT EXISTS current_prices (
+    dealer_id TEXT NOT NULL,
+    vin TEXT NOT NULL,
+    price REAL,
+    changed_at REAL NOT NULL,
+    dropped_at REAL,
+    drop_amount REAL,
+    PRIMARY KEY (dealer_id, vin)
+) WITHOUT ROWID;
+"""
+
+# SQLite's default limit on bound parameters is 999
+_LOOKUP_CHUNK = 500
+
+_SECONDS_PER_DAY = 86400
+
+
+def price_drop_label(dropped_at, now):
+    """PRICE_DROP_<days>D for the smallest window containing the last drop, or None"""
+    if dropped_at is None:
+        return None
+    age_days = (now - dropped_at) / _SECONDS_PER_DAY
+    for days in PRICE_DROP_DAYS:
+        if age_days <= days:
+            return f"PRICE_DROP_{days}D"
+    return None
+
+
+class PriceHistory:
+    """Price log with the latest price and last drop per (dealer, VIN)
+
+    ``price_changes`` only gets a row when a vehicle's price differs from its
+    ``current_prices`` row, so a run writes O(changed rows) and labels come
+    from the current row without reading the log back. Dealers listing the
+    same VIN are tracked separately since each advertises its own price.
+    """
+
+    def __init__(self, path=None, now=None):
+        self.path = path or PRICE_HISTORY_DB
+        self.now = now if now is not None else time.time()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Used from the render thread; the lock keeps calls from overlapping
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.executescript(_SCHEMA)
+        self.lock = threading.Lock()
+        self.observed = 0
+        self.changed = 0
+        self.drops = 0
+
+    def _current(self, dealer_id, vins):
+        current = {}
+        vins = list(vins)
+        for start in range(0, len(vins), _LOOKUP_CHUNK):
+            chunk = vins[start:start + _LOOKUP_CHUNK]
+            rows = self.db.execute(
+                f"SELECT vin, price, changed_at, dropped_at, drop_amount FROM current_prices "
+                f"WHERE dealer_id = ? AND vin IN ({','.join('?' * len(chunk))})", [dealer_id] + chunk
+            )
+            current.update((row[0], row[1:]) for row in rows)
+        return current
+
+    def _changed(self, previous, price):
+        """New (price, dropped_at, drop_amount) of a VIN whose price differs from its current row"""
+        if previous is None:
+            return price, None, None
+        previous_price, changed_at, dropped_at, drop_amount = previous
+        if previous_price is None or price is None or changed_at == self.now:
+            # No comparable price, or already recorded earlier in this run
+            return price, dropped_at, drop_amount
+        if price < previous_price:
+            self.drops += 1
+            return price, self.now, previous_price - price
+        # A price increase ends the drop
+        return price, None, None
+
+    def observe(self, dealer_id, vehicles, columns):
+        """Record this run's prices for one dealer's rows; returns their price-drop labels in row order
+
+        The price is the one the feeds advertise (selling price, else MSRP).
+        Rows repeating a VIN are compared with the previous run, not with
+        each other; the last one is stored.
+        """
+        with self.lock:
+            vins = [(vehicle.get('VIN') or '').strip().upper() for vehicle in vehicles]
+            current = self._current(dealer_id, {vin for vin in vins if vin})
+            changes = {}
+            for i, vin in enumerate(vins):
+                if not vin:
+                    continue
+                price = columns['price'][i] or columns['msrp'][i]
+                previous = current.get(vin)
+                if previous is None or previous[0] != price:
+                    changes[vin] = self._changed(previous, price)
+                else:
+                    changes.pop(vin, None)
+
+            labels = []
+            for vin in vins:
+                if not vin:
+                    labels.append(None)
+                elif vin in changes:
+                    labels.append(price_drop_label(changes[vin][1], self.now))
+                else:
+                    labels.append(price_drop_label(current[vin][2], self.now))
+
+            self.observed += len(vins)
+            self.changed += len(changes)
+            if changes:
+                with self.db:
+                    self.db.executemany("INSERT INTO price_changes (dealer_id, vin, observed_at, price) VALUES (?, ?, ?, ?)",
+                                        [(dealer_id, vin, self.now, price) for vin, (price, _, _) in changes.items()])
+                    self.db.executemany(
+                        "INSERT INTO current_prices (dealer_id, vin, price, changed_at, dropped_at, drop_amount) "
+                        "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (dealer_id, vin) DO UPDATE SET price = excluded.price, "
+                        "changed_at = excluded.changed_at, dropped_at = excluded.dropped_at, "
+                        "drop_amount = excluded.drop_amount",
+                        [(dealer_id, vin, price, self.now, dropped_at, drop_amount)
+                         for vin, (price, dropped_at, drop_amount) in changes.items()]
+                    )
+            return labels
+
+    def labels(self, dealer_id, vehicles):
+        """Price-drop labels of a dealer's rows as of now from the recorded prices, without recording any
+
+        Used to fingerprint rows before rendering, so a feed whose labels
+        move to another window (or expire) is not left as it was.
+        """
+        with self.lock:
+            vins = [(vehicle.get('VIN') or '').strip().upper() for vehicle in vehicles]
+            current = self._current(dealer_id, {vin for vin in vins if vin})
+            return [price_drop_label(current[vin][2], self.now) if vin in current else None for vin in vins]
+
+    def history(self, vin):
+        """[(dealer_id, observed_at, price)] of one VIN, oldest first"""
+        with self.lock:
+            return self.db.execute(
+                "SELECT dealer_id, observed_at, price FROM price_changes WHERE vin = ? ORDER BY observed_at",
+                (vin.strip().upper(),)
+            ).fetchall()
+
+    def report(self):
+        return {'observed': self.observed, 'changed': self.changed, 'drops': self.drops}
+
+    def close(self):
+        with self.lock:
+            self.db.close()
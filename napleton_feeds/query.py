@@ -0,0 +1,216 @@
+"""
+Read-only inventory queries over the latest flat catalog snapshot
+"""
+
+import base64
+import bisect
+import csv
+import hashlib
+import json
+import os
+from datetime import datetime
+
+from .catalogs import FlatCatalogTarget
+from .config import DEALERSHIPS, FEED_DIR
+from .normalize import map_body_style
+
+# Fields answered from an exact-match index; values are compared lowercased
+INDEXED_FIELDS = ('dealer_id', 'make', 'model', 'condition', 'body_style')
+
+# Fields with a sorted array for range filters and ordering
+RANGE_FIELDS = ('price', 'mileage', 'days_on_lot')
+
+QUERY_DEFAULT_LIMIT = 50
+QUERY_MAX_LIMIT = 500
+
+
+def _number(value, convert):
+    try:
+        return convert(value) if value else None
+    except ValueError:
+        return None
+
+
+def _vehicle(row):
+    """Query record for one flat catalog row"""
+    return {
+        'dealer_id': row['dealer_id'],
+        'dealership': DEALERSHIPS[row['dealer_id']]['name'] if row['dealer_id'] in DEALERSHIPS else None,
+        'vin': row['vin'],
+        'stock_number': row['stock_number'],
+        'condition': row['condition'],
+        'year': row['year'],
+        'make': row['make'],
+        'model': row['model'],
+        'trim': row['trim'],
+        'body': row['body_style'],
+        # Google VLA body style, so e.g. 'Sport Utility' and 'SUV' are both 'suv'
+        'body_style': map_body_style(row['body_style']),
+        'exterior_color': row['exterior_color'],
+        'price': _number(row['price'], float),
+        'msrp': _number(row['msrp'], float),
+        'mileage': _number(row['mileage'], int),
+        'days_on_lot': _number(row['days_on_lot'], int),
+        'age_label': row['age_label'] or None,
+        'url': row['url'],
+        'image_url': row['image_url'] or None
+    }
+
+
+class InventoryIndex:
+    """Vehicles of one snapshot with secondary indexes
+
+    ``postings`` maps each indexed field to {lowercased value: positions};
+    ``ranges`` holds each range field's (sorted values, positions) arrays,
+    leaving out vehicles without a value, and ``ranks`` each position's
+    place in them.
+    """
+
+    def __init__(self, vehicles, version, generated_at):
+        self.vehicles = vehicles
+        self.version = version
+        self.generated_at = generated_at
+        self.postings = {field: {} for field in INDEXED_FIELDS}
+        for position, vehicle in enumerate(vehicles):
+            for field in INDEXED_FIELDS:
+                value = (vehicle[field] or '').lower()
+                self.postings[field].setdefault(value, []).append(position)
+
+        self.ranges = {}
+        self.ranks = {}
+        for field in RANGE_FIELDS:
+            pairs = sorted((vehicle[field], position) for position, vehicle in enumerate(vehicles)
+                           if vehicle[field] is not None)
+            self.ranges[field] = ([value for value, _ in pairs], [position for _, position in pairs])
+            # Position -> place in the sorted array (None without a value), for ordering matches
+            ranks = [None] * len(vehicles)
+            for rank, (_, position) in enumerate(pairs):
+                ranks[position] = rank
+            self.ranks[field] = ranks
+
+    def match(self, filters=None, ranges=None):
+        """Positions matching every filter, or None for all vehicles
+
+        ``filters`` maps indexed fields to accepted values (any of them);
+        ``ranges`` maps range fields to inclusive (low, high) bounds, either
+        of which may be None.
+        """
+        candidates = []
+        for field, values in (filters or {}).items():
+            postings = self.postings[field]
+            candidates.append({p for value in values for p in postings.get(value.lower(), ())})
+        for field, (low, high) in (ranges or {}).items():
+            values, positions = self.ranges[field]
+            start = bisect.bisect_left(values, low) if low is not None else 0
+            end = bisect.bisect_right(values, high) if high is not None else len(values)
+            candidates.append(set(positions[start:end]))
+        if not candidates:
+            return None
+
+        candidates.sort(key=len)
+        matched = candidates[0]
+        for other in candidates[1:]:
+            matched = matched & other
+        return matched
+
+    def ordered(self, matched, sort=None):
+        """Matched positions in result order: by a range field (``-field`` descending), else snapshot order
+
+        Vehicles without a value for the sort field come last.
+        """
+        positions = sorted(matched) if matched is not None else range(len(self.vehicles))
+        if not sort:
+            return list(positions)
+        ranks = self.ranks[sort.lstrip('-')]
+        valued = sorted((p for p in positions if ranks[p] is not None), key=ranks.__getitem__,
+                        reverse=sort.startswith('-'))
+        return valued + [p for p in positions if ranks[p] is None]
+
+    def query(self, filters=None, ranges=None, sort=None, limit=QUERY_DEFAULT_LIMIT, cursor=None, count_only=False):
+        """Count and page through the vehicles matching the filters
+
+        ``cursor`` is the ``next_cursor`` of the previous page; it is only
+        valid for the same snapshot and query.
+        """
+        if sort and sort.lstrip('-') not in RANGE_FIELDS:
+            raise ValueError(f"Unknown sort: {sort} (expected {', '.join(RANGE_FIELDS)}, optionally with '-')")
+        matched = self.match(filters, ranges)
+        total = len(self.vehicles) if matched is None else len(matched)
+        result = {'snapshot': self.version, 'generated_at': self.generated_at, 'total': total}
+        if count_only:
+            return result
+
+        limit = max(1, min(limit, QUERY_MAX_LIMIT))
+        query_hash = _query_hash(filters, ranges, sort, limit)
+        offset = self._decode_cursor(cursor, query_hash) if cursor else 0
+        page = self.ordered(matched, sort)[offset:offset + limit]
+        result['vehicles'] = [self.vehicles[p] for p in page]
+        result['next_cursor'] = self._encode_cursor(offset + limit, query_hash) if offset + limit < total else None
+        return result
+
+    def _encode_cursor(self, offset, query_hash):
+        raw = json.dumps({'s': self.version, 'q': query_hash, 'o': offset}, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    def _decode_cursor(self, cursor, query_hash):
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            decoded = json.loads(raw)
+            snapshot, query, offset = decoded['s'], decoded['q'], int(decoded['o'])
+        except (ValueError, KeyError, TypeError):
+            raise ValueError("Invalid cursor")
+        if snapshot != self.version:
+            raise ValueError("Cursor is from an older inventory snapshot; start again without it")
+        if query != query_hash:
+            raise ValueError("Cursor is from a different query; start again without it")
+        return max(offset, 0)
+
+
+def _query_hash(filters, ranges, sort, limit):
+    """Short hash of a normalized query, so a cursor only pages through the query that made it"""
+    normalized = {
+        'filters': {field: sorted({value.lower() for value in values})
+                    for field, values in sorted((filters or {}).items())},
+        'ranges': {field: list(bounds) for field, bounds in sorted((ranges or {}).items())},
+        'sort': sort or None,
+        'limit': limit,
+    }
+    raw = json.dumps(normalized, sort_keys=True, separators=(',', ':')).encode()
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def _catalog_files(feed_dir):
+    """(name, mtime_ns, size) of every flat CSV catalog in feed_dir"""
+    suffix = FlatCatalogTarget.suffix
+    with os.scandir(feed_dir) as entries:
+        return tuple(sorted(
+            (entry.name, entry.stat().st_mtime_ns, entry.stat().st_size)
+            for entry in entries if entry.name.endswith(suffix)
+        ))
+
+
+def build_inventory_index(feed_dir, files=None):
+    """Load every flat catalog in feed_dir into an InventoryIndex"""
+    files = files if files is not None else _catalog_files(feed_dir)
+    if not files:
+        raise FileNotFoundError(f"No {FlatCatalogTarget.suffix} catalogs in {feed_dir}")
+    vehicles = []
+    for name, _, _ in files:
+        with open(os.path.join(feed_dir, name), 'r', encoding='utf-8', newline='') as f:
+            vehicles.extend(_vehicle(row) for row in csv.DictReader(f))
+    version = hashlib.blake2b(repr(files).encode(), digest_size=8).hexdigest()
+    generated_at = datetime.fromtimestamp(max(mtime for _, mtime, _ in files) / 1e9).isoformat()
+    return InventoryIndex(vehicles, version, generated_at)
+
+
+# (catalog file signature, index) - rebuilt only when a catalog changes
+_INDEX = (None, None)
+
+
+def load_inventory_index(feed_dir=FEED_DIR):
+    """Cached InventoryIndex for feed_dir; raises FileNotFoundError without catalogs"""
+    global _INDEX
+    files = _catalog_files(feed_dir)
+    if _INDEX[0] != files:
+        _INDEX = (files, build_inventory_index(feed_dir, files))
+    return _INDEX[1]
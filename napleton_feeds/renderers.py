@@ -0,0 +1,487 @@
+"""
+Facebook AIA and Google VLA feed renderers, and single-pass rendering of every target
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from functools import lru_cache
+
+from .config import DEALERSHIP_FIELDS, split_option_values
+from .descriptions import feed_description
+from .normalize import (
+    PHOTO_CACHE_SIZE, ensure_store_placeholder, map_body_style, map_body_style_facebook, normalized_vehicles,
+    parse_photos
+)
+from .targets import FEED_SUFFIXES, FEED_TARGETS, FeedWriter, XmlFeedTarget, register_target
+
+
+def _pretty_xml(root):
+    """Serialize a feed tree with two-space indentation"""
+    # minidom is only needed once a feed is rendered, not at import time
+    from xml.dom import minidom
+    rough_string = ET.tostring(root, encoding='unicode')
+    reparsed = minidom.parseString(rough_string)
+    return reparsed.toprettyxml(indent="  ")
+
+
+class DealerFragments:
+    """Elements that are the same for every vehicle of a dealership
+
+    Built once per dealership and appended to each listing/entry as the same
+    objects; ElementTree keeps no parent links, so one element can sit under
+    many parents and is serialized in place each time.
+    """
+
+    def __init__(self, dealership):
+        address = ET.Element('address', {'format': 'simple'})
+        for name, field in (('addr1', 'street_address'), ('city', 'city'), ('region', 'region'),
+                            ('country', 'country'), ('postal_code', 'postal_code')):
+            ET.SubElement(address, 'component', {'name': name}).text = dealership[field]
+        self.facebook_address = address
+
+        store = [
+            _g_element('store_code', dealership['store_code']),
+            _g_element('dealership_name', dealership['name']),
+            _g_element('dealership_address', dealership['address']),
+        ]
+        fulfillment = _g_element('vehicle_fulfillment')
+        _add_g_element(fulfillment, 'option', 'in_store')
+        _add_g_element(fulfillment, 'store_code', dealership['store_code'])
+        self.google_store = store + [fulfillment]
+
+
+_DEALER_FRAGMENTS = {}
+
+
+def dealer_fragments(dealership):
+    """Cached DealerFragments for a dealership's current field values"""
+    key = tuple(dealership.get(field) for field in DEALERSHIP_FIELDS)
+    fragments = _DEALER_FRAGMENTS.get(key)
+    if fragments is None:
+        fragments = _DEALER_FRAGMENTS[key] = DealerFragments(dealership)
+    return fragments
+
+
+@lru_cache(maxsize=PHOTO_CACHE_SIZE)
+def _facebook_images(photo_url):
+    """<image> elements of a gallery, built once per PhotoURL string
+
+    Shared between listings (and feeds) the same way as DealerFragments.
+    """
+    images = []
+    for i, url in enumerate(parse_photos(photo_url)[:20]):
+        image_elem = ET.Element('image')
+        ET.SubElement(image_elem, 'url').text = url
+        if i == 0:
+            ET.SubElement(image_elem, 'tag').text = 'main'
+        images.append(image_elem)
+    return tuple(images)
+
+
+class FacebookWriter(FeedWriter):
+    """Facebook AIA <listing> per vehicle with a price and photos"""
+
+    def __init__(self, dealership, stats=None):
+        self.root = ET.Element('listings')
+        self.dealership = dealership
+        self.fragments = dealer_fragments(dealership)
+        self.stats = stats
+
+    def add(self, item):
+        vehicle = item.row
+        # Pre-check required fields - skip vehicle if missing
+        price = item.price or item.msrp
+        if not price:
+            if self.stats:
+                self.stats.skip(vehicle, 'no_price')
+            return  # Skip if no price
+
+        photos = item.photos
+        if not photos:
+            if self.stats:
+                self.stats.skip(vehicle, 'no_photos')
+            return  # Skip if no images
+
+        listing = ET.SubElement(self.root, 'listing')
+
+        # Required: vehicle_id (use VIN)
+        ET.SubElement(listing, 'vehicle_id').text = vehicle['VIN'].lower()
+
+        # Required: Title (Year Make Model Trim)
+        title_parts = [
+            vehicle.get('Year', '').strip(),
+            vehicle.get('Make', '').strip(),
+            vehicle.get('Model', '').strip(),
+            vehicle.get('Trim', '').strip()
+        ]
+        title = ' '.join(part for part in title_parts if part)
+        ET.SubElement(listing, 'title').text = title
+
+        # Required: Description
+        description_parts = [
+            f"{vehicle.get('Year', '')} {vehicle.get('Make', '')} {vehicle.get('Model', '')}".strip(),
+        ]
+        if vehicle.get('Trim'):
+            description_parts.append(f"Trim: {vehicle['Trim']}")
+        if vehicle.get('ExteriorColor'):
+            description_parts.append(f"Color: {vehicle['ExteriorColor']}")
+        if vehicle.get('Body'):
+            description_parts.append(f"Body Style: {vehicle['Body']}")
+
+        description = '. '.join(description_parts) + '.'
+        ET.SubElement(listing, 'description').text = description
+
+        # Required: Address with nested component structure (shared per dealer)
+        listing.append(self.fragments.facebook_address)
+
+        # Vehicle details
+        ET.SubElement(listing, 'year').text = vehicle['Year']
+        ET.SubElement(listing, 'make').text = vehicle['Make']
+        ET.SubElement(listing, 'model').text = vehicle['Model']
+        ET.SubElement(listing, 'vin').text = vehicle['VIN'].lower()
+        ET.SubElement(listing, 'content_ids').text = vehicle['VIN'].lower()
+        ET.SubElement(listing, 'availability').text = 'in stock'
+
+        # Required: Price
+        ET.SubElement(listing, 'price').text = f"{price:.2f} USD"
+
+        # URL
+        url = vehicle.get('VDPURL') or f"{self.dealership['website']}/inventory/details/{vehicle['VIN']}"
+        ET.SubElement(listing, 'url').text = url
+
+        # Required: state_of_vehicle (NEW/USED/CPO)
+        condition_raw = vehicle.get('New/Used', '').upper()
+        if condition_raw == 'N':
+            state_of_vehicle = 'NEW'
+        elif condition_raw == 'C':
+            state_of_vehicle = 'CPO'
+        else:
+            state_of_vehicle = 'USED'
+        ET.SubElement(listing, 'state_of_vehicle').text = state_of_vehicle
+
+        # Required: condition (new/used/cpo)
+        if condition_raw == 'N':
+            condition = 'new'
+        elif condition_raw == 'C':
+            condition = 'cpo'
+        else:
+            condition = 'used'
+        ET.SubElement(listing, 'condition').text = condition
+
+        # Required: Mileage with proper structure (unit must be uppercase "MI")
+        mileage_int = item.miles
+        if item.miles_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_miles')
+        if mileage_int is None and condition_raw == 'N':
+            # Default to 0 for new vehicles with missing or unparsable mileage
+            mileage_int = 0
+        if mileage_int is not None:
+            mileage_elem = ET.SubElement(listing, 'mileage')
+            ET.SubElement(mileage_elem, 'value').text = str(mileage_int)
+            ET.SubElement(mileage_elem, 'unit').text = 'MI'
+
+        # Optional fields
+        if vehicle.get('Trim'):
+            ET.SubElement(listing, 'trim').text = vehicle['Trim']
+
+        # Required: Body style - use Facebook's accepted values
+        if vehicle.get('Body'):
+            fb_body_style = map_body_style_facebook(vehicle['Body'])
+        else:
+            fb_body_style = 'OTHER'
+        ET.SubElement(listing, 'body_style').text = fb_body_style
+
+        if vehicle.get('ExteriorColor'):
+            ET.SubElement(listing, 'exterior_color').text = vehicle['ExteriorColor']
+        if vehicle.get('InteriorColor'):
+            ET.SubElement(listing, 'interior_color').text = vehicle['InteriorColor']
+
+        # Days on lot (from NumberOfDays column)
+        if item.days is not None:
+            ET.SubElement(listing, 'days_on_lot').text = str(item.days)
+        elif item.days_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_days_on_lot')
+
+        # Recent price drop (PRICE_DROP_7D etc.) for catalog filters
+        if item.price_label:
+            ET.SubElement(listing, 'custom_label_0').text = item.price_label
+
+        # Required: Images with proper structure (already pre-checked above)
+        listing.extend(_facebook_images(item.photo_url))
+
+    def finish(self):
+        return _pretty_xml(self.root)
+
+
+G_NAMESPACE = 'http://base.google.com/ns/1.0'
+
+
+def _g_element(tag, text=None, attrib=None):
+    """Detached element under the Google namespace"""
+    element = ET.Element(f"{{{G_NAMESPACE}}}{tag}", attrib or {})
+    if text is not None:
+        element.text = text
+    return element
+
+
+def _add_g_element(parent, tag, text=None, attrib=None):
+    """Helper to add an element under the Google namespace"""
+    element = ET.SubElement(parent, f"{{{G_NAMESPACE}}}{tag}", attrib or {})
+    if text is not None:
+        element.text = text
+    return element
+
+
+class GoogleWriter(FeedWriter):
+    """Google VLA <entry> per vehicle with a VIN and a price (MSRP for new vehicles)"""
+
+    def __init__(self, dealership, stats=None):
+        self.root = ET.Element('feed', {
+            'xmlns': 'http://www.w3.org/2005/Atom',
+            'xmlns:g': 'http://base.google.com/ns/1.0'
+        })
+
+        ET.SubElement(self.root, 'title').text = f"{dealership['name']} Inventory Feed"
+        ET.SubElement(self.root, 'link', {'href': dealership['website'], 'rel': 'self'})
+        ET.SubElement(self.root, 'updated').text = datetime.now().isoformat()
+        self.dealership = dealership
+        self.fragments = dealer_fragments(dealership)
+        self.stats = stats
+
+    def add(self, item):
+        vehicle = item.row
+        vin = (vehicle.get('VIN') or '').strip()
+        if not vin:
+            # Skip vehicles without a VIN as they cannot be served in VLAs
+            if self.stats:
+                self.stats.skip(vehicle, 'no_vin')
+            return
+
+        # Determine vehicle condition first (needed for MSRP validation)
+        condition_raw = (vehicle.get('New/Used') or '').upper()
+        if condition_raw == 'N':
+            condition = 'new'
+        elif condition_raw == 'C':
+            condition = 'certified'
+        else:
+            condition = 'used'
+        
+        # Price handling - use PRICE if available, fallback to MSRP
+        selling_price = item.price
+        msrp_price = item.msrp
+        
+        # Google requires at least one valid price
+        if not selling_price and not msrp_price:
+            # Skip vehicles without any valid price - Google requires price for VLAs
+            if self.stats:
+                self.stats.skip(vehicle, 'no_price')
+            return
+        
+        # For NEW vehicles, MSRP is REQUIRED by Google VLA
+        if condition == 'new' and not msrp_price:
+            # Skip new vehicles without MSRP - Google requires it for new VLAs
+            if self.stats:
+                self.stats.skip(vehicle, 'no_msrp_for_new')
+            return
+        
+        # Use selling price as primary, or MSRP as fallback
+        primary_price = selling_price or msrp_price
+
+        stock_number = (vehicle.get('StockNo') or '').strip()
+        product_id = stock_number or vin
+
+        entry = ET.SubElement(self.root, 'entry')
+        ET.SubElement(entry, 'id').text = product_id
+
+        trim_value = (vehicle.get('Trim') or '').strip()
+        if len(trim_value) > 150:
+            trim_value = trim_value[:150]
+
+        title_parts = [vehicle.get('Year', '').strip(), vehicle.get('Make', '').strip(), vehicle.get('Model', '').strip(), trim_value]
+        title = " ".join(part for part in title_parts if part).strip()
+        ET.SubElement(entry, 'title').text = title
+
+        url = (vehicle.get('VDPURL') or '').strip() or f"{self.dealership['website']}/inventory/details/{vin}"
+        ET.SubElement(entry, 'link', {'rel': 'alternate', 'href': url})
+
+        # Required VLA fields
+        _add_g_element(entry, 'id', product_id)
+        _add_g_element(entry, 'price', f"{primary_price:.2f} USD")
+        
+        # MSRP handling based on condition
+        # For NEW vehicles: MSRP is REQUIRED by Google VLA (use vehicle_msrp field)
+        # For USED/CERTIFIED: MSRP is optional but recommended if available and different
+        if condition == 'new':
+            # New vehicles must have MSRP (already validated above, so msrp_price exists)
+            _add_g_element(entry, 'vehicle_msrp', f"{msrp_price:.2f} USD")
+        elif msrp_price and selling_price and msrp_price != selling_price:
+            # For used/certified, only add if different from selling price
+            _add_g_element(entry, 'vehicle_msrp', f"{msrp_price:.2f} USD")
+        
+        _add_g_element(entry, 'vin', vin)
+        _add_g_element(entry, 'google_product_category', '916')
+        _add_g_element(entry, 'brand', vehicle.get('Make', '').strip() or self.dealership['name'])
+
+        # Store/Dealership information (required for VLA) and vehicle fulfillment -
+        # in-store pickup only (no shipping for vehicles); shared per dealer
+        entry.extend(self.fragments.google_store)
+
+        # Vehicle details
+        if vehicle.get('Year'):
+            _add_g_element(entry, 'year', vehicle['Year'].strip())
+        if vehicle.get('Make'):
+            _add_g_element(entry, 'make', vehicle['Make'].strip())
+        if vehicle.get('Model'):
+            _add_g_element(entry, 'model', vehicle['Model'].strip())
+
+        _add_g_element(entry, 'condition', condition)
+        _add_g_element(entry, 'availability', 'in stock')
+
+        # Description from CSV, as plain text within Google's length limit
+        description = feed_description(vehicle, self.stats)
+        if description:
+            _add_g_element(entry, 'description', description)
+
+        # VDP tracking templates
+        link_template_url = ensure_store_placeholder(url)
+        _add_g_element(entry, 'link_template', link_template_url)
+
+        # Optional fields
+        if trim_value:
+            _add_g_element(entry, 'trim', trim_value)
+
+        # Mileage - must include unit in the value per Google VLA spec
+        mileage = item.miles
+        if mileage is not None:
+            if mileage >= 0:
+                # Google VLA requires unit in the text: "25000 miles"
+                _add_g_element(entry, 'mileage', f"{mileage} miles")
+            elif self.stats:
+                self.stats.coerce(vehicle, 'negative_miles')
+        elif item.miles_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_miles')
+
+        # Body style - map to Google VLA accepted values
+        if vehicle.get('Body'):
+            mapped_body_style = map_body_style(vehicle['Body'])
+            if mapped_body_style:
+                _add_g_element(entry, 'body_style', mapped_body_style)
+
+        if vehicle.get('ExteriorColor'):
+            _add_g_element(entry, 'color', vehicle['ExteriorColor'].strip())
+
+        # Images - First image is main image_link, rest are additional_image_link
+        entry.extend(_google_images(item.photo_url))
+
+        # Custom labels for campaign targeting
+        if vehicle.get('Model'):
+            _add_g_element(entry, 'custom_label_0', vehicle['Model'].strip())
+        
+        # Days on lot as custom label for age-based campaign rules
+        if item.age_label is not None:
+            _add_g_element(entry, 'custom_label_1', item.age_label)
+        elif item.days_bad and self.stats:
+            self.stats.coerce(vehicle, 'bad_days_on_lot')
+
+        # Recent price drop (PRICE_DROP_7D etc.) for price-drop campaigns
+        if item.price_label:
+            _add_g_element(entry, 'custom_label_2', item.price_label)
+
+    def finish(self):
+        return _pretty_xml(self.root)
+
+
+@lru_cache(maxsize=PHOTO_CACHE_SIZE)
+def _google_images(photo_url):
+    """g:image_link plus up to 9 g:additional_image_link elements, built once per PhotoURL string"""
+    photos = parse_photos(photo_url)
+    if not photos:
+        return ()
+    return (_g_element('image_link', photos[0]),) + \
+        tuple(_g_element('additional_image_link', url) for url in photos[1:10])
+
+
+class FacebookTarget(XmlFeedTarget):
+    name = 'facebook'
+    suffix = '_Facebook_AIA.xml'
+    item_tag = 'listing'
+    default = True
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return FacebookWriter(dealership, feed_stats)
+
+
+_ENTRY_ID_PATTERN = re.compile(rb'<id>([^<]*)</id>')
+_UPDATED_PATTERN = re.compile(rb'<updated>[^<]*</updated>')
+
+
+class GoogleTarget(XmlFeedTarget):
+    name = 'google'
+    suffix = '_Google_VLA.xml'
+    item_tag = 'entry'
+    default = True
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        return GoogleWriter(dealership, feed_stats)
+
+    def product_id(self, fragment):
+        # Google entries are keyed by stock number when one exists
+        id_match = _ENTRY_ID_PATTERN.search(fragment)
+        return id_match.group(1).decode('utf-8').strip() if id_match else ''
+
+    def stable_content(self, feed_bytes):
+        # The feed-level <updated> is the render time
+        return _UPDATED_PATTERN.sub(b'<updated />', feed_bytes, count=1)
+
+
+register_target(FacebookTarget())
+register_target(GoogleTarget())
+
+
+def safe_dealer_name(dealership):
+    """Dealership name as used in feed file names"""
+    return dealership['name'].replace(' ', '_').replace('/', '_')
+
+
+def feed_filename(dealership, platform):
+    """File name of a dealership's feed for one platform"""
+    return f"{safe_dealer_name(dealership)}{FEED_SUFFIXES[platform]}"
+
+
+def select_platforms(values):
+    """Resolve --platform / ?platform= values to platform names (None means all)"""
+    selected = []
+    for platform in split_option_values(values):
+        platform = platform.lower()
+        if platform not in FEED_TARGETS:
+            raise ValueError(f"Unknown platform: {platform} (expected {', '.join(FEED_TARGETS)})")
+        if platform not in selected:
+            selected.append(platform)
+    return selected or None
+
+
+def render_targets(platforms, dealer_id, dealership, vehicles, stats, columns=None):
+    """Render several targets' feeds for a dealer in one pass over its rows
+
+    Each row is normalized once and handed to every target's writer, so an
+    extra target costs its own output, not another parse. Returns
+    {platform: (filename, content, feed_stats)} in ``platforms`` order.
+    """
+    writers = []
+    for platform in platforms:
+        feed_stats = stats.feed(platform, dealer_id)
+        writers.append((platform, FEED_TARGETS[platform].writer(dealer_id, dealership, feed_stats), feed_stats))
+
+    for item in normalized_vehicles(vehicles, columns):
+        for _, writer, _ in writers:
+            writer.add(item)
+
+    return {
+        platform: (feed_filename(dealership, platform), writer.finish(), feed_stats)
+        for platform, writer, feed_stats in writers
+    }
+
+
+# Registers the Microsoft, TikTok and flat catalog targets
+from . import catalogs  # noqa: E402,F401
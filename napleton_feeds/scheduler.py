@@ -0,0 +1,228 @@
+"""
+Deadline-aware ordering and execution of per-feed jobs
+"""
+
+import hashlib
+import os
+import time
+
+from .config import DEALERSHIPS
+from .normalize import normalize_columns
+from .renderers import FEED_TARGETS, feed_filename, render_targets
+from .stats import skip_key
+from .targets import default_platforms
+
+# Seconds a run may take before remaining feeds are carried over (0 for no limit)
+FEED_TIME_BUDGET_SECONDS = float(os.environ.get('FEED_TIME_BUDGET_SECONDS', '0'))
+
+# Part of the budget kept free for cleanup and reporting
+DEADLINE_MARGIN_SECONDS = float(os.environ.get('FEED_DEADLINE_MARGIN_SECONDS', '10'))
+
+# Feed order: 'inventory' (largest dealer first), 'changed' (most rows changed since the
+# last run first) or 'configured' (dealers in FEED_PRIORITY_ORDER first, then by inventory)
+FEED_PRIORITY = os.environ.get('FEED_PRIORITY', 'inventory')
+FEED_PRIORITY_ORDER = [d.strip() for d in os.environ.get('FEED_PRIORITY_ORDER', '').split(',') if d.strip()]
+PRIORITIES = ('inventory', 'changed', 'configured')
+
+
+def row_fingerprints(vehicles, labels=None):
+    """Short hash of each source row, keyed by VIN (or stock number)
+
+    ``labels`` (price-drop labels in row order) are hashed with their rows,
+    so a label change alone marks the row as changed.
+    """
+    fingerprints = {}
+    for i, row in enumerate(vehicles):
+        text = '\x1f'.join(str(value) for value in row.values())
+        if labels and labels[i]:
+            text += '\x1f' + labels[i]
+        fingerprints[skip_key(row)] = hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()
+    return fingerprints
+
+
+def count_changed(previous, current):
+    """Rows added, removed or modified since the previous fingerprints"""
+    if previous is None:
+        return len(current)
+    changed = sum(1 for key, digest in current.items() if previous.get(key) != digest)
+    return changed + sum(1 for key in previous if key not in current)
+
+
+class FeedTask:
+    """One (dealer, platform) feed to render and publish"""
+
+    def __init__(self, dealer_id, platform, vehicles, changed=None):
+        self.dealer_id = dealer_id
+        self.platform = platform
+        self.filename = feed_filename(DEALERSHIPS[dealer_id], platform)
+        self.vehicles = vehicles
+        self.changed = changed
+
+    def to_dict(self):
+        return {
+            'feed': self.filename,
+            'dealer_id': self.dealer_id,
+            'platform': self.platform,
+            'vehicles': self.vehicles,
+            'changed_rows': self.changed
+        }
+
+
+class DeadlineScheduler:
+    """Orders feed tasks by priority and carries over what would not finish in time
+
+    Each task's duration is estimated from the slowest seconds-per-vehicle
+    seen so far on its platform. A task that would run past the budget
+    (less the margin) is skipped and its previous feed left in place, while
+    smaller tasks further down the list still run if they fit.
+    """
+
+    def __init__(self, budget_seconds=None, priority=None, order=None,
+                 margin_seconds=DEADLINE_MARGIN_SECONDS, started=None):
+        self.budget_seconds = budget_seconds or None
+        self.priority = priority or FEED_PRIORITY
+        if self.priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {self.priority} (expected {', '.join(PRIORITIES)})")
+        self.order = order if order is not None else FEED_PRIORITY_ORDER
+        self.margin_seconds = margin_seconds
+        self.started = started if started is not None else time.monotonic()
+        self.seconds_per_vehicle = {}
+        self.refreshed = []
+        self.carried_over = []
+        self.unchanged = []
+        self.failed = []
+
+    def plan(self, counts, platforms=None, previous=None, fingerprints=None, skip_unchanged=False):
+        """Build the ordered task list for dealers with vehicles
+
+        ``fingerprints`` (current row hashes per dealer) and ``previous`` (row
+        hashes per feed file from the last run) are needed for 'changed' and
+        ``skip_unchanged``, which leaves feeds with no changed rows as they are.
+        """
+        dealer_rank = {dealer_id: i for i, dealer_id in enumerate(DEALERSHIPS)}
+        platform_rank = list(FEED_TARGETS)
+        platforms = platforms or default_platforms()
+        tasks = []
+        for dealer_id, count in counts.items():
+            if not count:
+                continue
+            for platform in platform_rank:
+                if platform not in platforms:
+                    continue
+                task = FeedTask(dealer_id, platform, count)
+                if fingerprints is not None:
+                    task.changed = count_changed((previous or {}).get(task.filename), fingerprints[dealer_id])
+                if skip_unchanged and task.changed == 0:
+                    self.unchanged.append(task.to_dict())
+                    continue
+                tasks.append(task)
+
+        def sort_key(task):
+            # Ties keep the dealer's platforms together so its prepared rows are released soon
+            tail = (-task.vehicles, dealer_rank[task.dealer_id], platform_rank.index(task.platform))
+            if self.priority == 'changed':
+                return (-(task.changed or 0),) + tail
+            if self.priority == 'configured':
+                rank = self.order.index(task.dealer_id) if task.dealer_id in self.order else len(self.order)
+                return (rank,) + tail
+            return tail
+
+        return sorted(tasks, key=sort_key)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def remaining(self):
+        """Seconds left for new tasks, or None without a budget"""
+        if self.budget_seconds is None:
+            return None
+        return self.budget_seconds - self.margin_seconds - self.elapsed()
+
+    def estimate(self, task):
+        rates = self.seconds_per_vehicle
+        return rates.get(task.platform, max(rates.values(), default=0.0)) * task.vehicles
+
+    def admit(self, task):
+        """Whether the task fits in the remaining budget; records it as carried over if not"""
+        remaining = self.remaining()
+        estimate = self.estimate(task)
+        if remaining is not None and (remaining <= 0 or estimate > remaining):
+            self.carried_over.append(dict(task.to_dict(), estimated_seconds=round(estimate, 2)))
+            return False
+        return True
+
+    def record(self, task, seconds):
+        """Record a finished task and update its platform's rate"""
+        rate = seconds / max(task.vehicles, 1)
+        self.seconds_per_vehicle[task.platform] = max(rate, self.seconds_per_vehicle.get(task.platform, 0.0))
+        self.refreshed.append(dict(task.to_dict(), seconds=round(seconds, 3)))
+
+    def fail(self, task):
+        """Record a task whose feed was rendered but not published; its previous feed stays"""
+        self.failed.append(task.to_dict())
+
+    def report(self):
+        return {
+            'priority': self.priority,
+            'budget_seconds': self.budget_seconds,
+            'elapsed_seconds': round(self.elapsed(), 2),
+            'refreshed': self.refreshed,
+            'carried_over': self.carried_over,
+            'unchanged': self.unchanged,
+            'failed': self.failed
+        }
+
+
+class FeedRenderer:
+    """Renders scheduled feeds one target at a time, sharing each dealer's prepared rows
+
+    A dealer's rows are loaded and normalized for its first task and kept
+    until its remaining tasks are rendered or skipped, so each task's time
+    (and the scheduler's per-vehicle rate) covers only its own target. With
+    a ``PriceHistory``, each dealer's prices are recorded once and its
+    price-drop labels passed to the writers. Not thread-safe: one renderer
+    per thread.
+    """
+
+    def __init__(self, dealership_vehicles, stats, fingerprints=None, tasks=None, price_history=None):
+        self.dealership_vehicles = dealership_vehicles
+        self.stats = stats
+        self.price_history = price_history
+        self.fingerprints = dict(fingerprints or {})
+        self.pending = {}
+        for task in tasks or ():
+            self.pending[task.dealer_id] = self.pending.get(task.dealer_id, 0) + 1
+        self.prepared = {}
+
+    def _prepare(self, dealer_id):
+        """(rows, normalized columns) for a dealer, loaded on its first task"""
+        if dealer_id not in self.prepared:
+            vehicles = self.dealership_vehicles[dealer_id]
+            columns = normalize_columns(vehicles)
+            if self.price_history:
+                columns['price_label'] = self.price_history.observe(dealer_id, vehicles, columns)
+                # Published with the labels actually written, for the next run's comparison
+                self.fingerprints[dealer_id] = row_fingerprints(vehicles, columns['price_label'])
+            elif dealer_id not in self.fingerprints:
+                self.fingerprints[dealer_id] = row_fingerprints(vehicles)
+            self.prepared[dealer_id] = (vehicles, columns)
+        return self.prepared[dealer_id]
+
+    def skip(self, task):
+        """Mark a task as done without rendering it; frees its dealer's rows after the last one"""
+        remaining = self.pending.get(task.dealer_id, 1) - 1
+        if remaining > 0:
+            self.pending[task.dealer_id] = remaining
+        else:
+            self.pending.pop(task.dealer_id, None)
+            self.prepared.pop(task.dealer_id, None)
+
+    def render(self, task):
+        """Returns (content, feed_stats, row_hashes) for one task"""
+        vehicles, columns = self._prepare(task.dealer_id)
+        feeds = render_targets([task.platform], task.dealer_id, DEALERSHIPS[task.dealer_id], vehicles, self.stats,
+                               columns)
+        _, content, feed_stats = feeds[task.platform]
+        fingerprints = self.fingerprints[task.dealer_id]
+        self.skip(task)
+        return content, feed_stats, fingerprints
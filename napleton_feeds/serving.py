@@ -0,0 +1,203 @@
+"""
+Conditional, compressed and ranged responses for generated feed files
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+
+from .feed_index import feed_digest, gzip_feed
+
+# Feed bytes (plain + gzip) kept in memory per instance
+FEED_CACHE_MB = float(os.environ.get('FEED_CACHE_MB', '64'))
+
+# Cache-Control max-age for served feeds; ETags make revalidation cheap after that
+FEED_MAX_AGE_SECONDS = int(os.environ.get('FEED_MAX_AGE_SECONDS', '300'))
+
+
+class CachedFeed:
+    """One feed version: its bytes, precomputed gzip and validators"""
+
+    def __init__(self, body, digest, mtime):
+        self.body = body
+        self.digest = digest
+        self.etag = f'"{digest}"'
+        self.last_modified = formatdate(mtime, usegmt=True)
+        self.mtime = int(mtime)
+        compressed = gzip_feed(body)
+        # Only worth a separate representation if it is actually smaller
+        self.gzip_body = compressed if len(compressed) < len(body) else None
+        self.gzip_etag = f'"{digest}-gz"'
+
+    @property
+    def size(self):
+        return len(self.body) + len(self.gzip_body or b'')
+
+
+class FeedCache:
+    """LRU of feed versions keyed by content hash, bounded by total bytes
+
+    File paths map to the hash of their contents, checked against the file's
+    mtime and size on every request, so a regenerated feed is picked up
+    without a restart and unchanged feeds are never re-read or re-compressed.
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes if max_bytes is not None else int(FEED_CACHE_MB * 1024 * 1024)
+        self.entries = OrderedDict()
+        self.paths = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, path):
+        """Return (CachedFeed, hit) for a feed file; raises FileNotFoundError"""
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            known = self.paths.get(path)
+            if known and known[0] == signature and known[1] in self.entries:
+                self.entries.move_to_end(known[1])
+                self.hits += 1
+                return self.entries[known[1]], True
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        digest = feed_digest(body)
+
+        with self.lock:
+            self.misses += 1
+            self.paths[path] = (signature, digest)
+            entry = self.entries.get(digest)
+            if entry is None:
+                entry = CachedFeed(body, digest, stat.st_mtime)
+                if entry.size <= self.max_bytes:
+                    self.entries[digest] = entry
+                    self.bytes += entry.size
+                    self._evict()
+            else:
+                self.entries.move_to_end(digest)
+            return entry, False
+
+    def _evict(self):
+        while self.bytes > self.max_bytes and self.entries:
+            _, entry = self.entries.popitem(last=False)
+            self.bytes -= entry.size
+
+    def metrics(self):
+        with self.lock:
+            return {'feeds': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+
+def _etag_matches(header, etags):
+    """Weak comparison of an If-None-Match header against our ETags"""
+    if header.strip() == '*':
+        return True
+    candidates = {tag.strip()[2:] if tag.strip().startswith('W/') else tag.strip() for tag in header.split(',')}
+    return bool(candidates & set(etags))
+
+
+def _accepts_gzip(header):
+    """Whether an Accept-Encoding header allows gzip (with a q-value above 0)"""
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        if coding.strip().lower() in ('gzip', '*'):
+            q = params.strip().lower()
+            if not q.startswith('q='):
+                return True
+            try:
+                return float(q[2:] or 0) > 0
+            except ValueError:
+                # A malformed q-value is treated as not acceptable
+                return False
+    return False
+
+
+def _parse_range(header, size):
+    """(start, end) inclusive for a single 'bytes=' range, 'unsatisfiable', or None to ignore it"""
+    unit, _, spec = header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        # Other units and multipart ranges are not supported; send the whole feed
+        return None
+    first, _, last = spec.strip().partition('-')
+    try:
+        if not first:
+            length = int(last)
+            if length <= 0:
+                return 'unsatisfiable'
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or end < start:
+        return 'unsatisfiable'
+    return start, min(end, size - 1)
+
+
+def feed_response(cache, path, headers, method='GET', content_type='application/xml; charset=utf-8'):
+    """Build (status, response headers, body) for serving one feed file
+
+    ``headers`` is the request's header mapping. Handles If-None-Match (and
+    If-Modified-Since without it), gzip negotiation and single byte ranges.
+    Ranges apply to the uncompressed feed, so a ranged request is never
+    gzipped; If-Range with a stale validator gets the full feed instead.
+    """
+    try:
+        entry, hit = cache.get(path)
+    except FileNotFoundError:
+        return 404, {'Content-Type': 'application/json'}, b'{"error": "Feed not found"}'
+
+    use_gzip = entry.gzip_body is not None and _accepts_gzip(headers.get('Accept-Encoding'))
+    range_header = headers.get('Range')
+    if_range = headers.get('If-Range')
+    if range_header and if_range and if_range.strip() not in (entry.etag, entry.last_modified):
+        range_header = None
+    if range_header:
+        use_gzip = False
+
+    response_headers = {
+        'Content-Type': content_type,
+        'ETag': entry.gzip_etag if use_gzip else entry.etag,
+        'Last-Modified': entry.last_modified,
+        'Cache-Control': f'public, max-age={FEED_MAX_AGE_SECONDS}',
+        'Vary': 'Accept-Encoding',
+        'Accept-Ranges': 'bytes',
+        'X-Cache': 'HIT' if hit else 'MISS'
+    }
+
+    if_none_match = headers.get('If-None-Match')
+    if if_none_match:
+        not_modified = _etag_matches(if_none_match, (entry.etag, entry.gzip_etag))
+    else:
+        not_modified = False
+        since = headers.get('If-Modified-Since')
+        if since:
+            try:
+                not_modified = entry.mtime <= parsedate_to_datetime(since).timestamp()
+            except (TypeError, ValueError):
+                pass
+    if not_modified:
+        del response_headers['Content-Type']
+        return 304, response_headers, b''
+
+    status = 200
+    body = entry.body
+    if use_gzip:
+        body = entry.gzip_body
+        response_headers['Content-Encoding'] = 'gzip'
+    elif range_header:
+        byte_range = _parse_range(range_header, len(entry.body))
+        if byte_range == 'unsatisfiable':
+            response_headers['Content-Range'] = f'bytes */{len(entry.body)}'
+            return 416, response_headers, b''
+        if byte_range:
+            start, end = byte_range
+            status = 206
+            body = entry.body[start:end + 1]
+            response_headers['Content-Range'] = f'bytes {start}-{end}/{len(entry.body)}'
+
+    response_headers['Content-Length'] = str(len(body))
+    return status, response_headers, b'' if method == 'HEAD' else body
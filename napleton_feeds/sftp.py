@@ -0,0 +1,250 @@
+"""
+Inventory download from the Vincue SFTP drop
+"""
+
+import fnmatch
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .config import SFTP_CONFIG
+
+# Seconds between SSH keepalive packets on a held-open connection
+SFTP_KEEPALIVE_SECONDS = int(os.environ.get('SFTP_KEEPALIVE_SECONDS', '30'))
+
+# Socket timeout for SFTP requests, so a dead connection fails instead of hanging
+SFTP_TIMEOUT_SECONDS = 15
+
+# Inventory exports to ingest from the drop directory (fnmatch pattern)
+SFTP_FILE_PATTERN = os.environ.get('SFTP_FILE_PATTERN', '*.csv')
+
+# SFTP channels used to download several exports at once
+SFTP_DOWNLOAD_WORKERS = int(os.environ.get('SFTP_DOWNLOAD_WORKERS', '4'))
+
+
+class SFTPConnection:
+    """SFTP session that can be held open between runs
+
+    A module-level instance in a Vercel function survives warm invocations,
+    so only cold starts (or a dropped connection) pay for the SSH handshake.
+    ``client()`` checks the session with a round trip and reconnects if it
+    has gone away.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or SFTP_CONFIG
+        self.transport = None
+        self.sftp = None
+        self.handshakes = 0
+        self.reuses = 0
+        self.handshake_seconds = 0.0
+        self.last_handshake_seconds = None
+        # One download at a time per session (concurrent background jobs share it)
+        self.lock = threading.Lock()
+
+    def connect(self):
+        """Open a new transport and SFTP channel, replacing any existing one"""
+        # paramiko (and cryptography under it) is the slowest import in the tree;
+        # load it only when a connection is actually made
+        import paramiko
+
+        missing = [f"SFTP_{field.upper()}" for field in ('host', 'username', 'password') if not self.config.get(field)]
+        if missing:
+            raise RuntimeError(f"SFTP is not configured: set {', '.join(missing)}")
+
+        self.close()
+        print(f"Connecting to SFTP: {self.config['host']}")
+        start = time.perf_counter()
+        transport = paramiko.Transport((self.config['host'], 22))
+        try:
+            transport.connect(username=self.config['username'], password=self.config['password'])
+            transport.set_keepalive(SFTP_KEEPALIVE_SECONDS)
+            sftp = paramiko.SFTPClient.from_transport(transport)
+            sftp.get_channel().settimeout(SFTP_TIMEOUT_SECONDS)
+        except:
+            transport.close()
+            raise
+
+        self.transport = transport
+        self.sftp = sftp
+        self.last_handshake_seconds = time.perf_counter() - start
+        self.handshake_seconds += self.last_handshake_seconds
+        self.handshakes += 1
+        return sftp
+
+    def is_alive(self):
+        """Check the session with a cheap round trip to the server"""
+        if self.sftp is None or not self.transport.is_active():
+            return False
+        try:
+            self.sftp.stat('.')
+            return True
+        except Exception:
+            return False
+
+    def client(self):
+        """Return a live SFTP client, reusing the open session when possible"""
+        if self.is_alive():
+            self.reuses += 1
+            self.last_handshake_seconds = 0.0
+            return self.sftp
+        return self.connect()
+
+    def open_channel(self):
+        """Open an extra SFTP channel on the current transport, for parallel transfers"""
+        import paramiko
+
+        sftp = paramiko.SFTPClient.from_transport(self.transport)
+        sftp.get_channel().settimeout(SFTP_TIMEOUT_SECONDS)
+        return sftp
+
+    def close(self):
+        """Close the SFTP channel and transport"""
+        if self.sftp is not None:
+            try:
+                self.sftp.close()
+            except Exception:
+                pass
+        if self.transport is not None:
+            self.transport.close()
+        self.sftp = None
+        self.transport = None
+
+    def metrics(self):
+        """Handshake vs reuse counters for run reports"""
+        return {
+            'handshakes': self.handshakes,
+            'reuses': self.reuses,
+            'handshake_ms_total': round(self.handshake_seconds * 1000, 1),
+            'last_handshake_ms': round(self.last_handshake_seconds * 1000, 1)
+                                 if self.last_handshake_seconds is not None else None
+        }
+
+
+def _csv_files(sftp, directory):
+    """Exports in the drop directory matching SFTP_FILE_PATTERN, newest first"""
+    sftp.chdir(directory)
+    files = [attr for attr in sftp.listdir_attr() if fnmatch.fnmatch(attr.filename, SFTP_FILE_PATTERN)]
+    if not files:
+        raise Exception("No CSV files found")
+    # listdir order is arbitrary, so pick by modification time (then name)
+    return sorted(files, key=lambda attr: (-(attr.st_mtime or 0), attr.filename))
+
+
+def _download_file(sftp, attr):
+    """Download one export to a temp file; returns its source description"""
+    with tempfile.NamedTemporaryFile(mode='w+', delete=False, suffix='.csv') as tmp:
+        try:
+            sftp.get(attr.filename, tmp.name)
+        except:
+            os.unlink(tmp.name)
+            raise
+    return {'name': attr.filename, 'size': attr.st_size, 'mtime': attr.st_mtime, 'path': tmp.name}
+
+
+def _download_all_csvs(connection, sftp, directory, workers):
+    """Download every matching export, over several channels when there is more than one"""
+    files = _csv_files(sftp, directory)
+    print(f"Found {len(files)} CSV file(s): {', '.join(attr.filename for attr in files)}")
+    if len(files) == 1 or workers <= 1:
+        downloads = []
+        try:
+            for attr in files:
+                downloads.append(_download_file(sftp, attr))
+        except:
+            remove_downloads(downloads)
+            raise
+        return downloads
+
+    # Each extra channel has its own request window, so transfers overlap
+    # on the one transport instead of queueing behind each other
+    channels = [sftp] + [connection.open_channel() for _ in range(min(workers, len(files)) - 1)]
+    for channel in channels[1:]:
+        channel.chdir(directory)
+    free = list(channels)
+    free_lock = threading.Lock()
+
+    def download(attr):
+        with free_lock:
+            channel = free.pop()
+        try:
+            return _download_file(channel, attr)
+        finally:
+            with free_lock:
+                free.append(channel)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(channels), thread_name_prefix='sftp-download') as pool:
+            futures = [pool.submit(download, attr) for attr in files]
+        downloads = [future.result() for future in futures if future.exception() is None]
+        errors = [future.exception() for future in futures if future.exception() is not None]
+        if errors:
+            remove_downloads(downloads)
+            raise errors[0]
+        return downloads
+    finally:
+        for channel in channels[1:]:
+            channel.close()
+
+
+def _stat_csvs(sftp, directory):
+    """(name, size, mtime) of every matching export, without downloading"""
+    return tuple((attr.filename, attr.st_size, attr.st_mtime) for attr in _csv_files(sftp, directory))
+
+
+def _on_session(connection, action):
+    """Run action(sftp, directory) on a held-open connection, retrying once on a dropped session"""
+    with connection.lock:
+        handshakes = connection.handshakes
+        sftp = connection.client()
+        from paramiko import SSHException
+
+        try:
+            return action(sftp, connection.config['directory'])
+        except (EOFError, OSError, SSHException):
+            if connection.handshakes != handshakes:
+                raise
+            # The session passed the liveness check but dropped mid-request
+            print("SFTP connection dropped, reconnecting")
+            return action(connection.connect(), connection.config['directory'])
+
+
+def download_inventory_files(config=None, connection=None, workers=None):
+    """Download every export matching SFTP_FILE_PATTERN, newest first
+
+    Returns a list of {'name', 'size', 'mtime', 'path'} with ``path`` a local
+    temp file (see ``remove_downloads``). Several files are fetched in
+    parallel over up to ``workers`` channels of the same SSH transport.
+    """
+    workers = workers or SFTP_DOWNLOAD_WORKERS
+
+    def action(sftp, directory):
+        return _download_all_csvs(connection, sftp, directory, workers)
+
+    if connection is None:
+        connection = SFTPConnection(config)
+        try:
+            return action(connection.client(), connection.config['directory'])
+        finally:
+            connection.close()
+
+    return _on_session(connection, action)
+
+
+def remove_downloads(files):
+    """Delete the temp files of downloaded exports"""
+    for file in files:
+        try:
+            os.unlink(file['path'])
+        except FileNotFoundError:
+            pass
+
+
+def stat_remote_csv(connection):
+    """(name, size, mtime) of each export on a held-open connection, newest first
+
+    One directory listing, so polling it costs a round trip rather than a download.
+    """
+    return _on_session(connection, _stat_csvs)
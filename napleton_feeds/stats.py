@@ -0,0 +1,118 @@
+"""
+Skip, coercion and description size accounting for a feed generation run
+"""
+
+from collections import Counter
+
+from .config import DEALERSHIPS
+
+
+def skip_key(vehicle):
+    """Identify a skipped vehicle by VIN, falling back to stock number"""
+    vin = (vehicle.get('VIN') or '').strip().upper()
+    if vin:
+        return vin
+    stock_number = (vehicle.get('StockNo') or '').strip()
+    return f"stock:{stock_number}" if stock_number else 'unknown'
+
+
+class SkipStats:
+    """Run-wide counters of skipped vehicles and coerced values
+
+    Counts are keyed by (kind, platform, dealer_id, reason) and keep a few
+    sample VINs each, so inventory loss is visible without re-running.
+    """
+
+    SAMPLE_LIMIT = 5
+
+    def __init__(self):
+        self.counts = Counter()
+        self.samples = {}
+        # platform -> [source bytes, written bytes, truncated count] of cleaned descriptions
+        self.descriptions = {}
+
+    def feed(self, platform, dealer_id):
+        """Return a recorder bound to one (platform, dealer) feed"""
+        return FeedStats(self, platform, dealer_id)
+
+    def record(self, kind, platform, dealer_id, reason, key):
+        counter_key = (kind, platform, dealer_id, reason)
+        self.counts[counter_key] += 1
+        samples = self.samples.setdefault(counter_key, [])
+        if len(samples) < self.SAMPLE_LIMIT:
+            samples.append(key)
+
+    def total(self, kind):
+        return sum(count for (counter_kind, _, _, _), count in self.counts.items() if counter_kind == kind)
+
+    def summary(self):
+        """JSON-serializable summary for run reports and HTTP responses"""
+        by_reason = {'skipped': Counter(), 'coerced': Counter()}
+        details = []
+        for (kind, platform, dealer_id, reason), count in self.counts.most_common():
+            by_reason[kind][reason] += count
+            details.append({
+                'kind': kind,
+                'platform': platform,
+                'dealer_id': dealer_id,
+                'reason': reason,
+                'count': count,
+                'sample_vins': self.samples[(kind, platform, dealer_id, reason)]
+            })
+        return {
+            'total_skipped': self.total('skipped'),
+            'total_coerced': self.total('coerced'),
+            'by_reason': {kind: dict(counter) for kind, counter in by_reason.items()},
+            'details': details,
+            'descriptions': {
+                platform: {'source_bytes': source, 'written_bytes': written, 'saved_bytes': source - written,
+                           'truncated': truncated}
+                for platform, (source, written, truncated) in self.descriptions.items()
+            }
+        }
+
+
+class FeedStats:
+    """Skip/coercion recorder for a single (platform, dealer) feed"""
+
+    def __init__(self, registry, platform, dealer_id):
+        self.registry = registry
+        self.platform = platform
+        self.dealer_id = dealer_id
+        self.skipped = {}
+
+    def skip(self, vehicle, reason):
+        """Record a vehicle left out of the feed"""
+        key = skip_key(vehicle)
+        self.skipped[key] = reason
+        self.registry.record('skipped', self.platform, self.dealer_id, reason, key)
+
+    def coerce(self, vehicle, reason):
+        """Record a field value that was dropped or replaced with a default"""
+        self.registry.record('coerced', self.platform, self.dealer_id, reason, skip_key(vehicle))
+
+    def description(self, source_bytes, written_bytes, truncated):
+        """Record a Description written after cleanup"""
+        totals = self.registry.descriptions.setdefault(self.platform, [0, 0, 0])
+        totals[0] += source_bytes
+        totals[1] += written_bytes
+        totals[2] += truncated
+
+
+def print_skip_report(stats):
+    """Print skipped vehicles and coerced values by reason, dealer and platform"""
+    summary = stats.summary()
+    print(f"  Skipped vehicles: {summary['total_skipped']}")
+    print(f"  Coerced values: {summary['total_coerced']}")
+    for kind, reasons in summary['by_reason'].items():
+        if reasons:
+            print(f"    {kind} by reason: " + ', '.join(f"{reason}={count}" for reason, count in reasons.items()))
+    for platform, sizes in summary['descriptions'].items():
+        saved = sizes['saved_bytes'] / sizes['source_bytes'] if sizes['source_bytes'] else 0
+        print(f"  Descriptions ({platform}): {sizes['written_bytes'] / 1024:.0f} KB written from "
+              f"{sizes['source_bytes'] / 1024:.0f} KB, saved {sizes['saved_bytes'] / 1024:.0f} KB ({saved:.0%}), {sizes['truncated']} truncated")
+    for detail in summary['details']:
+        dealer = DEALERSHIPS.get(detail['dealer_id'], {}).get('name', detail['dealer_id'] or '(no dealer ID)')
+        samples = ', '.join(detail['sample_vins'])
+        print(f"    {detail['kind']:<8} {detail['platform']:<9} {dealer}: "
+              f"{detail['reason']} x{detail['count']} (e.g. {samples})")
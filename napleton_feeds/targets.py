@@ -0,0 +1,176 @@
+"""
+Feed target registry: one plugin per platform or catalog format
+"""
+
+import csv
+import io
+import os
+import re
+from functools import cached_property
+
+from .config import split_option_values
+
+# Registered targets by name, in registration order
+FEED_TARGETS = {}
+
+# File name suffix of each registered target
+FEED_SUFFIXES = {}
+
+
+class FeedWriter:
+    """Builds one feed from the normalized vehicle stream
+
+    ``add`` is called once per ``NormalizedVehicle`` of the dealer, in CSV
+    order; ``finish`` returns the feed text.
+    """
+
+    def add(self, vehicle):
+        raise NotImplementedError
+
+    def finish(self):
+        raise NotImplementedError
+
+
+class FeedTarget:
+    """A feed format: file suffix, writer and sidecar index extraction
+
+    ``default`` targets are rendered when no platform is requested; others
+    only with ``--platform`` or ``FEED_PLATFORMS``.
+    """
+
+    name = None
+    suffix = None
+    content_type = 'application/xml; charset=utf-8'
+    default = False
+
+    def writer(self, dealer_id, dealership, feed_stats):
+        """Return a FeedWriter for one dealer's feed"""
+        raise NotImplementedError
+
+    def index(self, feed_bytes):
+        """Map each VIN (and alternate product ID) to the byte range of its item
+
+        Returns (vehicles, stock_numbers) as stored in the sidecar index.
+        """
+        raise NotImplementedError
+
+    def stable_content(self, feed_bytes):
+        """Feed bytes without what changes on every render (e.g. a timestamp), for comparing versions"""
+        return feed_bytes
+
+
+_VIN_PATTERN = re.compile(rb'<(?:\w+:)?vin>([^<]*)</(?:\w+:)?vin>')
+
+
+class XmlFeedTarget(FeedTarget):
+    """Target whose items are repeated ``item_tag`` elements"""
+
+    item_tag = None
+
+    @cached_property
+    def item_pattern(self):
+        tag = self.item_tag.encode()
+        return re.compile(rb'<%s>.*?</%s>' % (tag, tag), re.S)
+
+    def index(self, feed_bytes):
+        vehicles = {}
+        stock_numbers = {}
+        for match in self.item_pattern.finditer(feed_bytes):
+            fragment = match.group(0)
+            vin_match = _VIN_PATTERN.search(fragment)
+            if not vin_match:
+                continue
+            vin = vin_match.group(1).decode('utf-8').strip().upper()
+            vehicles[vin] = [match.start(), match.end() - match.start()]
+            product_id = self.product_id(fragment)
+            if product_id and product_id != vin:
+                stock_numbers[product_id] = vin
+        return vehicles, stock_numbers
+
+    def product_id(self, fragment):
+        """Alternate ID an item is keyed by on its platform (e.g. a stock number)"""
+        return None
+
+
+class DelimitedFeedTarget(FeedTarget):
+    """Target written as one header line plus one line per vehicle"""
+
+    delimiter = ','
+    vin_column = 'vin'
+    id_column = None
+
+    def index(self, feed_bytes):
+        vehicles = {}
+        stock_numbers = {}
+        lines = feed_bytes.split(b'\n')
+        header = next(csv.reader([lines[0].decode('utf-8')], delimiter=self.delimiter), [])
+        vin_at = header.index(self.vin_column)
+        id_at = header.index(self.id_column) if self.id_column in header else None
+
+        offset = len(lines[0]) + 1
+        for line in lines[1:]:
+            if line:
+                values = next(csv.reader([line.decode('utf-8')], delimiter=self.delimiter))
+                vin = values[vin_at].strip().upper()
+                if vin:
+                    vehicles[vin] = [offset, len(line)]
+                    product_id = values[id_at].strip() if id_at is not None else ''
+                    if product_id and product_id != vin:
+                        stock_numbers[product_id] = vin
+            offset += len(line) + 1
+        return vehicles, stock_numbers
+
+
+def flatten_text(value):
+    """Single-line text for delimited catalogs, so every vehicle is one line"""
+    return ' '.join(str(value).split()) if value is not None else ''
+
+
+class DelimitedWriter(FeedWriter):
+    """Streams a header line, then one line per vehicle that ``row`` returns"""
+
+    header = ()
+    delimiter = ','
+
+    def __init__(self):
+        self.out = io.StringIO()
+        self.csv = csv.writer(self.out, delimiter=self.delimiter, lineterminator='\n')
+        self.csv.writerow(self.header)
+
+    def row(self, vehicle):
+        """Values for one vehicle in header order, or None to leave it out"""
+        raise NotImplementedError
+
+    def add(self, vehicle):
+        values = self.row(vehicle)
+        if values is not None:
+            self.csv.writerow([flatten_text(value) for value in values])
+
+    def finish(self):
+        return self.out.getvalue()
+
+
+def register_target(target):
+    """Add a target to the registry and return it"""
+    if target.name in FEED_TARGETS:
+        raise ValueError(f"Feed target already registered: {target.name}")
+    FEED_TARGETS[target.name] = target
+    FEED_SUFFIXES[target.name] = target.suffix
+    return target
+
+
+def default_platforms():
+    """Targets rendered when no platform is requested: FEED_PLATFORMS, or every default target"""
+    configured = split_option_values([os.environ.get('FEED_PLATFORMS', '')])
+    if configured:
+        return [name for name in FEED_TARGETS if name in configured]
+    return [name for name, target in FEED_TARGETS.items() if target.default]
+
+
+def platform_for_file(name):
+    """Target name for a feed file name, or None"""
+    for platform, suffix in FEED_SUFFIXES.items():
+        if name.endswith(suffix):
+            return platform
+    return None
+
@@ -0,0 +1,194 @@
+"""
+Multi-tenant runs: one SFTP source, dealership registry and feed directory per dealer group
+"""
+
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Tenant registry (JSON, or TOML on Python 3.11+)
+TENANTS_FILE = os.environ.get('TENANTS_FILE', 'tenants.json')
+
+# Tenants generated at the same time
+TENANT_CONCURRENCY = int(os.environ.get('TENANT_CONCURRENCY', '2'))
+
+# Output lines kept from a failed tenant for the report
+TENANT_LOG_TAIL = 20
+
+TENANT_FIELDS = ('dealerships_file', 'sftp', 'feed_dir')
+
+# Per-tenant worker limits -> the environment variable each one sets in the tenant's run
+TENANT_CONCURRENCY_SETTINGS = {
+    'downloads': 'SFTP_DOWNLOAD_WORKERS',
+    'publish': 'FEED_PUBLISH_CONCURRENCY',
+    'queue': 'FEED_QUEUE_SIZE',
+}
+
+
+def _path(base_dir, value):
+    """Path from the registry, relative to the registry file unless absolute"""
+    return os.path.normpath(os.path.join(base_dir, os.path.expandvars(value)))
+
+
+def load_tenants(path):
+    """Load tenants by name from a registry file
+
+    Each tenant needs ``dealerships_file``, ``sftp`` (``host``, ``username``,
+    ``password``, optional ``directory`` and ``file_pattern``) and
+    ``feed_dir``; optional keys are ``feed_base_url``, ``price_history_db``,
+    ``concurrency`` (``downloads``, ``publish``, ``queue``),
+    ``timeout_seconds`` and ``env``. ``$VARIABLE`` references are expanded
+    from the environment, so SFTP passwords can stay in secrets.
+    """
+    if path.endswith('.toml'):
+        import tomllib
+        with open(path, 'rb') as f:
+            registry = tomllib.load(f)
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            registry = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(path))
+    tenants = {}
+    for name, tenant in registry.get('tenants', {}).items():
+        missing = [field for field in TENANT_FIELDS if not tenant.get(field)]
+        missing += [f"sftp.{field}" for field in ('host', 'username', 'password')
+                    if tenant.get('sftp') and not tenant['sftp'].get(field)]
+        if missing:
+            raise ValueError(f"{path}: tenant {name} is missing {', '.join(missing)}")
+        unknown = set(tenant.get('concurrency', {})) - set(TENANT_CONCURRENCY_SETTINGS)
+        if unknown:
+            raise ValueError(f"{path}: tenant {name} has unknown concurrency settings: {', '.join(sorted(unknown))}")
+        tenants[name] = dict(
+            tenant,
+            dealerships_file=_path(base_dir, tenant['dealerships_file']),
+            feed_dir=_path(base_dir, tenant['feed_dir']),
+            price_history_db=_path(base_dir, tenant.get('price_history_db') or
+                                   os.path.join('history', f"{name}.sqlite"))
+        )
+    return tenants
+
+
+def tenant_environment(tenant, base=None):
+    """Environment for one tenant's run: its source, registry, sink and worker limits"""
+    env = dict(os.environ if base is None else base)
+    sftp = tenant['sftp']
+    env.update({
+        'SFTP_HOST': os.path.expandvars(sftp['host']),
+        'SFTP_USERNAME': os.path.expandvars(sftp['username']),
+        'SFTP_PASSWORD': os.path.expandvars(sftp['password']),
+        'SFTP_DIRECTORY': os.path.expandvars(sftp.get('directory', '/Vincue')),
+        'SFTP_FILE_PATTERN': sftp.get('file_pattern', '*.csv'),
+        'DEALERSHIPS_FILE': tenant['dealerships_file'],
+        'FEED_DIR': tenant['feed_dir'],
+        'PRICE_HISTORY_DB': tenant['price_history_db'],
+    })
+    if tenant.get('feed_base_url'):
+        env['FEED_BASE_URL'] = tenant['feed_base_url']
+    for setting, value in tenant.get('concurrency', {}).items():
+        env[TENANT_CONCURRENCY_SETTINGS[setting]] = str(int(value))
+    env.update({key: os.path.expandvars(str(value)) for key, value in tenant.get('env', {}).items()})
+    return env
+
+
+def run_tenant(name, tenant, command, output_lock=None):
+    """Run one tenant's generation in its own process; returns its report entry
+
+    ``command`` is the generator command line; ``--report <file>`` is
+    appended so the run's summary can be read back. Output is echoed with a
+    ``[name]`` prefix. A crash, non-zero exit or timeout only fails this
+    tenant.
+    """
+    output_lock = output_lock or threading.Lock()
+    tail = deque(maxlen=TENANT_LOG_TAIL)
+    fd, report_path = tempfile.mkstemp(prefix=f"tenant-{name}-", suffix='.json')
+    os.close(fd)
+    entry = {'tenant': name, 'feed_dir': tenant['feed_dir']}
+    start = time.perf_counter()
+    try:
+        process = subprocess.Popen(command + ['--report', report_path], env=tenant_environment(tenant),
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+        timeout = tenant.get('timeout_seconds')
+        timed_out = threading.Event()
+
+        def kill():
+            timed_out.set()
+            process.kill()
+
+        timer = threading.Timer(timeout, kill) if timeout else None
+        if timer:
+            timer.start()
+        try:
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                tail.append(line)
+                with output_lock:
+                    print(f"[{name}] {line}", flush=True)
+            exit_code = process.wait()
+        finally:
+            if timer:
+                timer.cancel()
+
+        entry['exit_code'] = exit_code
+        if exit_code == 0:
+            with open(report_path, 'r', encoding='utf-8') as f:
+                entry['summary'] = json.load(f)
+            entry['status'] = 'success'
+        else:
+            entry['status'] = 'failed'
+            entry['error'] = f"timed out after {timeout}s" if timed_out.is_set() else f"exited with {exit_code}"
+            entry['log_tail'] = list(tail)
+    except (OSError, ValueError) as e:
+        entry['status'] = 'failed'
+        entry['error'] = str(e)
+        entry['log_tail'] = list(tail)
+    finally:
+        os.remove(report_path)
+    entry['elapsed_seconds'] = round(time.perf_counter() - start, 2)
+    return entry
+
+
+def run_tenants(tenants, command, concurrency=None):
+    """Run tenants in parallel, at most ``concurrency`` at once; returns the aggregated report"""
+    concurrency = max(1, concurrency or TENANT_CONCURRENCY)
+    output_lock = threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='tenant') as pool:
+        futures = [pool.submit(run_tenant, name, tenant, command, output_lock) for name, tenant in tenants.items()]
+        entries = [future.result() for future in futures]
+
+    succeeded = [entry for entry in entries if entry['status'] == 'success']
+    totals = {}
+    for field in ('total_vehicles', 'refreshed', 'unchanged', 'identical', 'carried_over', 'removed',
+                  'skipped_vehicles'):
+        totals[field] = sum(entry['summary'].get(field, 0) for entry in succeeded)
+    return {
+        'tenants': entries,
+        'succeeded': len(succeeded),
+        'failed': len(entries) - len(succeeded),
+        'concurrency': concurrency,
+        'elapsed_seconds': round(time.perf_counter() - start, 2),
+        **totals
+    }
+
+
+def print_tenant_report(report):
+    """Print each tenant's outcome and timing, then the totals"""
+    print(f"\nTenants: {report['succeeded']} succeeded, {report['failed']} failed "
+          f"in {report['elapsed_seconds']}s ({report['concurrency']} at a time)")
+    for entry in report['tenants']:
+        if entry['status'] == 'success':
+            summary = entry['summary']
+            print(f"  ✓ {entry['tenant']}: {summary['total_vehicles']} vehicles, {summary['refreshed']} feeds "
+                  f"refreshed in {entry['elapsed_seconds']}s -> {entry['feed_dir']}")
+        else:
+            print(f"  ✗ {entry['tenant']}: {entry['error']} after {entry['elapsed_seconds']}s")
+            for line in entry['log_tail'][-5:]:
+                print(f"      {line}")
+    print(f"  Total: {report['total_vehicles']} vehicles, {report['refreshed']} feeds refreshed, "
+          f"{report['skipped_vehicles']} vehicles skipped")
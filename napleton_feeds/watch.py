@@ -0,0 +1,188 @@
+"""
+Watch mode: poll the SFTP export and regenerate feeds only when it changes
+"""
+
+import json
+import os
+import threading
+import time
+import traceback
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .sftp import SFTPConnection, stat_remote_csv
+
+# Minutes between checks of the remote export
+WATCH_INTERVAL_MINUTES = float(os.environ.get('WATCH_INTERVAL_MINUTES', '5'))
+
+# Port for the /health and /metrics endpoint (0 to disable)
+WATCH_METRICS_PORT = int(os.environ.get('WATCH_METRICS_PORT', '8080'))
+
+# Interface the unauthenticated endpoint binds to; set e.g. 0.0.0.0 to expose it beyond this host
+WATCH_METRICS_HOST = os.environ.get('WATCH_METRICS_HOST', '127.0.0.1')
+
+# Missed polls before /health reports the watcher as stale
+STALE_AFTER_POLLS = 3
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds).isoformat() if seconds else None
+
+
+class FeedWatcher:
+    """Polls the remote exports' names, sizes and mtimes over one SFTP session
+
+    ``run(connection)`` is called for the first poll and whenever the export
+    has changed since the last successful run; it returns a summary dict
+    that is kept for the metrics endpoint. A failed run is retried on the
+    next poll.
+    """
+
+    def __init__(self, run, interval_seconds, connection=None):
+        self.run = run
+        self.interval_seconds = interval_seconds
+        self.connection = connection or SFTPConnection()
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+        self.last_seen = None
+        self.last_generated = None
+        self.polls = 0
+        self.poll_errors = 0
+        self.consecutive_errors = 0
+        self.changes = 0
+        self.runs = 0
+        self.run_failures = 0
+        self.last_poll_at = None
+        self.last_poll_ms = None
+        self.last_change_at = None
+        self.last_run_at = None
+        self.last_run_seconds = None
+        self.last_run = None
+        self.last_error = None
+
+    def poll_once(self):
+        """Check the export and run the pipeline if it changed; returns True if it ran"""
+        start = time.perf_counter()
+        try:
+            remote = stat_remote_csv(self.connection)
+        except Exception as e:
+            with self.lock:
+                self.polls += 1
+                self.poll_errors += 1
+                self.consecutive_errors += 1
+                self.last_error = f"poll: {e}"
+            print(f"✗ SFTP poll failed: {e}")
+            # Start the next poll from a fresh session
+            self.connection.close()
+            return False
+
+        with self.lock:
+            self.polls += 1
+            self.consecutive_errors = 0
+            self.last_poll_at = time.time()
+            self.last_poll_ms = round((time.perf_counter() - start) * 1000, 1)
+            self.last_seen = remote
+            if remote == self.last_generated:
+                return False
+            self.changes += 1
+            self.last_change_at = self.last_poll_at
+
+        files = ', '.join(f"{name} ({size} bytes, modified {_timestamp(mtime)})" for name, size, mtime in remote)
+        print(f"\n{datetime.now().isoformat()} export changed: {files}")
+        run_start = time.perf_counter()
+        try:
+            summary = self.run(self.connection)
+        except Exception as e:
+            traceback.print_exc()
+            with self.lock:
+                self.runs += 1
+                self.run_failures += 1
+                self.last_error = f"run: {e}"
+            return True
+
+        with self.lock:
+            self.runs += 1
+            self.last_generated = remote
+            self.last_run_at = time.time()
+            self.last_run_seconds = round(time.perf_counter() - run_start, 2)
+            self.last_run = summary
+            self.last_error = None
+        return True
+
+    def serve_forever(self):
+        """Poll until stop() is called"""
+        print(f"Watching SFTP export every {self.interval_seconds / 60:g} minutes")
+        try:
+            while not self.stop_event.is_set():
+                self.poll_once()
+                self.stop_event.wait(self.interval_seconds)
+        finally:
+            self.connection.close()
+
+    def stop(self, *_):
+        self.stop_event.set()
+
+    def healthy(self):
+        """Whether the last poll succeeded recently and the last run did not fail"""
+        with self.lock:
+            last_ok = self.last_poll_at or self.started_at
+            fresh = time.time() - last_ok < self.interval_seconds * STALE_AFTER_POLLS + 60
+            return fresh and self.consecutive_errors < STALE_AFTER_POLLS and \
+                (self.last_error is None or not self.last_error.startswith('run:'))
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'started_at': _timestamp(self.started_at),
+                'interval_seconds': self.interval_seconds,
+                'polls': self.polls,
+                'poll_errors': self.poll_errors,
+                'consecutive_poll_errors': self.consecutive_errors,
+                'last_poll_at': _timestamp(self.last_poll_at),
+                'last_poll_ms': self.last_poll_ms,
+                'changes_detected': self.changes,
+                'last_change_at': _timestamp(self.last_change_at),
+                'runs': self.runs,
+                'run_failures': self.run_failures,
+                'last_run_at': _timestamp(self.last_run_at),
+                'last_run_seconds': self.last_run_seconds,
+                'last_run': self.last_run,
+                'last_error': self.last_error,
+                'remote_files': [dict(zip(('name', 'size', 'mtime'), file)) for file in self.last_seen or ()],
+                'sftp': self.connection.metrics()
+            }
+
+
+def start_metrics_server(watcher, port, host=None):
+    """Serve GET /health and /metrics for a watcher from a background thread (on WATCH_METRICS_HOST)"""
+
+    class handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/health':
+                healthy = watcher.healthy()
+                body = {'status': 'ok' if healthy else 'unhealthy', 'last_error': watcher.last_error}
+                self._send_json(200 if healthy else 503, body)
+            elif path == '/metrics':
+                self._send_json(200, watcher.metrics())
+            else:
+                self._send_json(404, {'error': 'Not found', 'endpoints': ['/health', '/metrics']})
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body, indent=2).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            # Health checks every few seconds would drown out the run output
+            pass
+
+    server = ThreadingHTTPServer((host or WATCH_METRICS_HOST, port), handler)
+    threading.Thread(target=server.serve_forever, name='watch-metrics', daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    print(f"Health and metrics on http://{bound_host}:{bound_port}/health and /metrics")
+    return server
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark the inventory CSV reader backends against each other
+Checks that every backend returns the same records as the csv module
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from napleton_feeds import inventory
+
+
+def scale_csv(csv_file, copies):
+    """Write a copy of the CSV with its data rows repeated to simulate a larger export"""
+    with open(csv_file, 'r', encoding='utf-8-sig', newline='') as f:
+        header = f.readline()
+        body = f.read()
+    if body and not body.endswith('\n'):
+        body += '\n'
+
+    tmp = tempfile.NamedTemporaryFile(mode='w', encoding='utf-8-sig', newline='', delete=False, suffix='.csv')
+    with tmp:
+        tmp.write(header)
+        for _ in range(copies):
+            tmp.write(body)
+    return tmp.name
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare CSV reader backends on an inventory export")
+    parser.add_argument('csv_file', help="Vincue inventory CSV")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per backend (best time is reported)")
+    parser.add_argument('--scale', type=int, default=1, help="repeat the data rows N times")
+    args = parser.parse_args(argv)
+
+    csv_file = scale_csv(args.csv_file, args.scale) if args.scale > 1 else args.csv_file
+
+    try:
+        size_mb = os.path.getsize(csv_file) / 1e6
+        reference = list(inventory.read_inventory_rows(csv_file, 'stdlib'))
+        print(f"{csv_file}: {len(reference)} rows, {size_mb:.1f} MB\n")
+
+        baseline = None
+        for backend in inventory.CSV_READERS:
+            if not inventory._csv_backend_available(backend):
+                print(f"  {backend:<8} not installed")
+                continue
+
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                rows = list(inventory.CSV_READERS[backend](csv_file))
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+            if backend == 'stdlib':
+                baseline = best
+            matches = 'same records' if rows == reference else 'RECORDS DIFFER'
+            print(f"  {backend:<8} {best * 1000:8.1f} ms  {len(rows) / best:10.0f} rows/s  {matches}")
+            if rows != reference:
+                return 1
+
+        if baseline:
+            print(f"\n  (stdlib baseline: {baseline * 1000:.1f} ms)")
+    finally:
+        if csv_file != args.csv_file:
+            os.unlink(csv_file)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
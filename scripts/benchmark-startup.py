@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure cold-start import cost of the Vercel functions and the local generator
+Runs each entry point in a fresh interpreter under ``python -X importtime``
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_POINTS = [
+    'api/generate-feeds.py',
+    'api/vin-lookup.py',
+    'api/feed-urls.py',
+    'api/feed.py',
+    'api/inventory.py',
+    'scripts/generate-feeds-local.py',
+]
+
+# Dependencies that should only load once a request actually needs them
+HEAVY_MODULES = ['paramiko', 'cryptography', 'requests', 'numpy', 'pyarrow', 'polars', 'xml.dom.minidom']
+
+# Entry points have hyphenated file names, so they are loaded by path like Vercel does
+LOADER = (
+    "import importlib.util, sys; "
+    "spec = importlib.util.spec_from_file_location('entry', sys.argv[1]); "
+    "spec.loader.exec_module(importlib.util.module_from_spec(spec))"
+)
+
+
+def run_importtime(code, *args):
+    """Run code in a fresh interpreter and return (wall seconds, importtime rows)"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code, *args],
+                          capture_output=True, text=True, cwd=ROOT_DIR)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # Nested imports are indented two spaces per level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return elapsed, rows
+
+
+def measure(entry_point, baseline, repeat):
+    """Best wall time, import time and imported modules of one entry point"""
+    best = None
+    for _ in range(repeat):
+        elapsed, rows = run_importtime(LOADER, os.path.join(ROOT_DIR, entry_point))
+        if best is None or elapsed < best[0]:
+            best = (elapsed, rows)
+
+    elapsed, rows = best
+    # Modules the bare interpreter already imports are not the entry point's cost
+    top_level = [row for row in rows if row[3] == 0 and row[0] not in baseline]
+    return {
+        'wall': elapsed,
+        'imports': sum(row[2] for row in top_level) / 1e6,
+        'modules': {row[0] for row in rows},
+        'slowest': sorted(top_level, key=lambda row: row[2], reverse=True),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report import-time cost of each entry point")
+    parser.add_argument('entry_points', nargs='*', default=ENTRY_POINTS,
+                        help="files to load, relative to the repo root")
+    parser.add_argument('--repeat', type=int, default=5, help="runs per entry point (best is reported)")
+    parser.add_argument('--top', type=int, default=5, help="slowest top-level imports to list")
+    args = parser.parse_args(argv)
+
+    bare_wall, bare_rows = run_importtime(LOADER.split(';')[0])
+    baseline = {row[0] for row in bare_rows}
+    print(f"Bare interpreter: {bare_wall * 1000:.0f} ms\n")
+
+    for entry_point in args.entry_points:
+        result = measure(entry_point, baseline, args.repeat)
+        print(f"{entry_point}: {result['wall'] * 1000:.0f} ms wall, {result['imports'] * 1000:.1f} ms in imports")
+        for name, _, cumulative_us, _ in result['slowest'][:args.top]:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+        loaded = [name for name in HEAVY_MODULES if name in result['modules']]
+        if loaded:
+            print(f"  ✗ loads at import: {', '.join(loaded)}")
+        else:
+            print("  ✓ no heavy dependencies loaded at import")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Look up a single vehicle in the generated feeds by VIN or stock number
+Uses the sidecar .index.json files and mmap to pull just that vehicle's item
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from napleton_feeds.config import FEED_DIR
+from napleton_feeds.lookup import lookup_vehicle
+from napleton_feeds.renderers import FEED_TARGETS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show a vehicle's entry in the generated feeds")
+    parser.add_argument('key', help="VIN or stock number")
+    parser.add_argument('--dealer', help="dealer ID or (part of) the dealership name")
+    parser.add_argument('--platform', choices=list(FEED_TARGETS))
+    parser.add_argument('--feed-dir', default=FEED_DIR)
+    args = parser.parse_args(argv)
+
+    results = lookup_vehicle(args.key, args.feed_dir, args.dealer, args.platform)
+    if not results:
+        print(f"✗ {args.key} not found in any feed index")
+        return 1
+
+    for result in results:
+        if result['status'] == 'skipped':
+            print(f"✗ {result['feed']}: skipped ({result['reason']})")
+        else:
+            print(f"✓ {result['feed']}: bytes {result['offset']}+{result['length']}")
+            print(result['fragment'])
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Validate generated feeds against Google VLA and Facebook AIA platform rules
+Streams each feed with iterparse so memory stays flat regardless of feed size
+"""
+
+import argparse
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from napleton_feeds.config import FEED_DIR
+from napleton_feeds.renderers import FEED_SUFFIXES
+from napleton_feeds.targets import platform_for_file
+
+ATOM_NAMESPACE = 'http://www.w3.org/2005/Atom'
+G_NAMESPACE = 'http://base.google.com/ns/1.0'
+
+PRICE_PATTERN = re.compile(r'^\d+\.\d{2} USD$')
+GOOGLE_MILEAGE_PATTERN = re.compile(r'^\d+ miles$')
+GOOGLE_DESCRIPTION_MAX_CHARS = 5000
+
+GOOGLE_CONDITIONS = {'new', 'used', 'certified'}
+FACEBOOK_STATES = {'NEW', 'USED', 'CPO'}
+
+
+def _local_name(tag):
+    """Strip the namespace from an element tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def check_google_entry(entry):
+    """Return (vehicle key, errors) for a single Google VLA <entry>"""
+    errors = []
+
+    def g(tag):
+        return (entry.findtext(f"{{{G_NAMESPACE}}}{tag}") or '').strip()
+
+    vin = g('vin')
+    key = vin or (entry.findtext(f"{{{ATOM_NAMESPACE}}}id") or '').strip() or '<unknown>'
+
+    # Required fields
+    for tag in ('id', 'price', 'vin', 'store_code', 'condition', 'image_link', 'link_template'):
+        if not g(tag):
+            errors.append(f"missing g:{tag}")
+    if not (entry.findtext(f"{{{ATOM_NAMESPACE}}}title") or '').strip():
+        errors.append("missing title")
+
+    # Formats
+    price = g('price')
+    if price and not PRICE_PATTERN.match(price):
+        errors.append(f"bad g:price format: {price!r}")
+
+    condition = g('condition')
+    if condition and condition not in GOOGLE_CONDITIONS:
+        errors.append(f"bad g:condition: {condition!r}")
+
+    # New vehicles must carry an MSRP
+    msrp = g('vehicle_msrp')
+    if condition == 'new' and not msrp:
+        errors.append("missing g:vehicle_msrp for new vehicle")
+    if msrp and not PRICE_PATTERN.match(msrp):
+        errors.append(f"bad g:vehicle_msrp format: {msrp!r}")
+
+    # link_template must end with & so Google can append its parameters
+    link_template = g('link_template')
+    if link_template:
+        if not link_template.endswith('&'):
+            errors.append("g:link_template does not end with '&'")
+        if '{store_code}' not in link_template:
+            errors.append("g:link_template missing {store_code} placeholder")
+
+    mileage = g('mileage')
+    if mileage and not GOOGLE_MILEAGE_PATTERN.match(mileage):
+        errors.append(f"bad g:mileage format: {mileage!r}")
+
+    description = g('description')
+    if len(description) > GOOGLE_DESCRIPTION_MAX_CHARS:
+        errors.append(f"g:description over {GOOGLE_DESCRIPTION_MAX_CHARS} characters ({len(description)})")
+
+    return key, errors
+
+
+def check_facebook_listing(listing):
+    """Return (vehicle key, errors) for a single Facebook AIA <listing>"""
+    errors = []
+
+    def text(tag):
+        return (listing.findtext(tag) or '').strip()
+
+    vin = text('vin')
+    key = (vin or text('vehicle_id') or '<unknown>').upper()
+
+    # Required fields
+    for tag in ('vehicle_id', 'title', 'description', 'year', 'make', 'model',
+                'vin', 'price', 'url', 'state_of_vehicle', 'body_style'):
+        if not text(tag):
+            errors.append(f"missing {tag}")
+
+    if listing.find('address') is None:
+        errors.append("missing address")
+
+    # Formats
+    price = text('price')
+    if price and not PRICE_PATTERN.match(price):
+        errors.append(f"bad price format: {price!r}")
+
+    state = text('state_of_vehicle')
+    if state and state not in FACEBOOK_STATES:
+        errors.append(f"bad state_of_vehicle: {state!r}")
+
+    # Mileage needs an integer value and an uppercase MI unit
+    mileage = listing.find('mileage')
+    if mileage is None:
+        errors.append("missing mileage")
+    else:
+        value = (mileage.findtext('value') or '').strip()
+        unit = (mileage.findtext('unit') or '').strip()
+        if not value.isdigit():
+            errors.append(f"bad mileage value: {value!r}")
+        if unit != 'MI':
+            errors.append(f"bad mileage unit: {unit!r} (expected 'MI')")
+
+    # At least one image with a URL
+    if not any((image.findtext('url') or '').strip() for image in listing.iter('image')):
+        errors.append("no images")
+
+    return key, errors
+
+
+# Platforms with rules to check -> (item tag, item check)
+VALIDATED_PLATFORMS = {
+    'google': ('entry', check_google_entry),
+    'facebook': ('listing', check_facebook_listing),
+}
+
+
+def detect_platform(path):
+    """Work out which platform a feed belongs to from its file name"""
+    return platform_for_file(os.path.basename(path))
+
+
+def validate_feed(path):
+    """Stream a feed and collect per-vehicle errors"""
+    platform = detect_platform(path)
+    result = {
+        'path': path,
+        'platform': platform,
+        'vehicles': 0,
+        'errors': {},
+        'fatal': None
+    }
+
+    if platform not in VALIDATED_PLATFORMS:
+        expected = ' or '.join(f"*{FEED_SUFFIXES[name]}" for name in VALIDATED_PLATFORMS)
+        result['fatal'] = f"unknown feed type (expected {expected})"
+        return result
+    item_tag, check = VALIDATED_PLATFORMS[platform]
+
+    depth = 0
+    root = None
+    try:
+        for event, element in ET.iterparse(path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+
+            depth -= 1
+            # Only top-level items are checked; nested elements are inspected
+            # through their parent and released together with it
+            if depth == 1 and _local_name(element.tag) == item_tag:
+                result['vehicles'] += 1
+                key, errors = check(element)
+                if errors:
+                    result['errors'].setdefault(key, []).extend(errors)
+                element.clear()
+                root.clear()
+    except ET.ParseError as e:
+        result['fatal'] = f"XML parse error: {e}"
+
+    if result['fatal'] is None and result['vehicles'] == 0:
+        result['fatal'] = f"no <{item_tag}> elements found"
+
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate generated Google VLA and Facebook AIA feeds")
+    parser.add_argument('paths', nargs='*',
+                        help=f"feed files to validate (default: the Google and Facebook feeds in {FEED_DIR}/)")
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count() or 1,
+                        help="number of feeds to validate in parallel")
+    parser.add_argument('--max-errors', type=int, default=20,
+                        help="maximum number of vehicles to list per feed (0 for all)")
+    args = parser.parse_args(argv)
+
+    # Only the Google and Facebook formats are checked; other catalog targets are skipped
+    paths = args.paths or sorted(
+        os.path.join(FEED_DIR, name) for name in (os.listdir(FEED_DIR) if os.path.isdir(FEED_DIR) else [])
+        if platform_for_file(name) in VALIDATED_PLATFORMS
+    )
+    if not paths:
+        print(f"✗ No feeds found in {FEED_DIR}/")
+        return 1
+
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, len(paths)))) as pool:
+        results = list(pool.map(validate_feed, paths))
+
+    failed_feeds = 0
+    total_vehicles = 0
+    total_invalid = 0
+    for result in results:
+        total_vehicles += result['vehicles']
+        total_invalid += len(result['errors'])
+
+        if result['fatal']:
+            failed_feeds += 1
+            print(f"✗ {result['path']}: {result['fatal']}")
+            continue
+
+        if not result['errors']:
+            print(f"✓ {result['path']} ({result['vehicles']} vehicles)")
+            continue
+
+        failed_feeds += 1
+        print(f"✗ {result['path']} ({len(result['errors'])} of {result['vehicles']} vehicles invalid)")
+        items = list(result['errors'].items())
+        shown = items if args.max_errors <= 0 else items[:args.max_errors]
+        for key, errors in shown:
+            print(f"    {key}: {'; '.join(errors)}")
+        if len(shown) < len(items):
+            print(f"    ... and {len(items) - len(shown)} more")
+
+    print(f"\nValidated {len(results)} feeds, {total_vehicles} vehicles: "
+          f"{total_invalid} invalid vehicles in {failed_feeds} feeds")
+    return 1 if failed_feeds else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,38 @@
+from napleton_feeds.descriptions import clean_description
+
+DISCLAIMER = ("<b><u>Napleton Autos Online Pricing Disclaimer</u></b>\\n"
+              "Prices labeled as the Napleton Price include all eligible dealer discounts.")
+
+
+def test_disclaimer_paragraph_only_is_dropped():
+    text = f"Great truck.\\n\\n{DISCLAIMER}\\n\\nAsk about our service specials!"
+    plain, _, _, _ = clean_description(text)
+    assert plain == "Great truck. Ask about our service specials!"
+
+
+def test_disclaimer_ends_at_section_break():
+    text = f"Great truck.\\n{DISCLAIMER}\\n<h4>Options</h4>Tow package"
+    plain, _, _, _ = clean_description(text)
+    assert plain == "Great truck. Options. Tow package."
+
+
+def test_disclaimer_at_the_end():
+    plain, _, _, _ = clean_description(f"Great truck.\\n\\n{DISCLAIMER}")
+    assert plain == "Great truck."
+
+
+def test_over_escaped_quotes_are_collapsed():
+    plain, _, _, _ = clean_description('WHEELS: 20"" X 9"" ALUMINUM, <h4 class=""name"">Options</h4>')
+    assert plain == 'WHEELS: 20" X 9" ALUMINUM, Options.'
+
+
+def test_quotes_left_alone_when_not_over_escaped():
+    plain, _, _, _ = clean_description('12.3" display, "" as typed, and a 20" wheel')
+    assert plain == '12.3" display, "" as typed, and a 20" wheel.'
+
+
+def test_cached_by_digest():
+    text = "Line one\\nLine two"
+    first = clean_description(text)
+    assert clean_description(text) == first
+    assert first == ("Line one. Line two.", len(text), len("Line one. Line two."), False)
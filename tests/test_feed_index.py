@@ -0,0 +1,41 @@
+import os
+import stat
+
+from napleton_feeds.feed_index import publish_file, write_feed
+
+GOOGLE_FEED = ('<feed><updated>{}</updated>'
+               '<entry><id>S1</id><g:vin>1GNSKCKD0NR100001</g:vin><g:price>30000 USD</g:price></entry></feed>')
+
+
+def test_publish_file_mode(tmp_path):
+    path = tmp_path / 'feed.xml'
+    umask = os.umask(0o022)
+    try:
+        publish_file(str(path), b'one')
+        assert stat.S_IMODE(path.stat().st_mode) == 0o644
+        path.chmod(0o640)
+        publish_file(str(path), b'two')
+    finally:
+        os.umask(umask)
+    assert path.read_bytes() == b'two'
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_write_feed_ignores_google_updated_time(tmp_path):
+    path = str(tmp_path / 'Dealer_Google_VLA.xml')
+    assert write_feed(path, GOOGLE_FEED.format('2026-10-19T00:00:00'), 'google', '28685', {})
+    assert not write_feed(path, GOOGLE_FEED.format('2026-10-19T04:00:00'), 'google', '28685', {})
+    with open(path, encoding='utf-8') as f:
+        assert '2026-10-19T00:00:00' in f.read()
+    assert write_feed(path, GOOGLE_FEED.format('2026-10-19T04:00:00').replace('30000', '29000'),
+                      'google', '28685', {})
+
+
+def test_write_feed_checks_published_bytes(tmp_path):
+    path = tmp_path / 'Dealer_Google_VLA.xml'
+    content = GOOGLE_FEED.format('2026-10-19T00:00:00')
+    assert write_feed(str(path), content, 'google', '28685', {})
+    # Same size, different bytes: the index alone would say it is up to date
+    path.write_text(content.replace('30000', '31000'), encoding='utf-8')
+    assert write_feed(str(path), content, 'google', '28685', {})
+    assert path.read_text(encoding='utf-8') == content
@@ -0,0 +1,159 @@
+import csv
+import io
+import mmap
+
+import pytest
+
+from napleton_feeds.inventory import (process_inventory, process_inventory_files, process_inventory_parallel,
+                                     read_inventory_rows, split_csv_records)
+from napleton_feeds.stats import SkipStats
+
+FIELDS = ['DealerID', 'VIN', 'StockNo', 'New/Used', 'Year', 'Make', 'Model', 'PRICE', 'NumberOfDays']
+
+
+def write_export(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for dealer_id, vin, price, days in rows:
+            writer.writerow({'DealerID': dealer_id, 'VIN': vin, 'StockNo': vin[-6:], 'New/Used': 'U',
+                             'Year': '2022', 'Make': 'Chevrolet', 'Model': 'Tahoe', 'PRICE': price,
+                             'NumberOfDays': days})
+    return {'name': path.name, 'size': path.stat().st_size, 'mtime': path.stat().st_mtime, 'path': str(path)}
+
+
+def test_multiple_exports_stdlib_backend(tmp_path):
+    # newest first, as download_inventory_files returns them
+    files = [
+        write_export(tmp_path / 'new.csv', [('28685', 'VIN0000000000001', '30000', '5'),
+                                            ('29312', 'VIN0000000000002', '41000', '12'),
+                                            ('216163', 'VIN0000000000003', '25000', '3')]),
+        write_export(tmp_path / 'old.csv', [('28685', 'VIN0000000000001', '31000', '4'),
+                                            ('148261', 'VIN0000000000004', '52000', '40'),
+                                            ('99999', 'VIN0000000000005', '10000', '1')]),
+    ]
+    stats = SkipStats()
+
+    vehicles = process_inventory_files(files, stats, backend='stdlib')
+
+    counts = vehicles.counts()
+    assert sum(counts.values()) == 4
+    assert counts['28685'] == 1 and counts['29312'] == 1 and counts['148261'] == 1
+    # The retired dealer ID is routed to the dealership it was merged into
+    assert counts['50912'] == 1
+    # The VIN in both exports is kept from the newest one
+    assert [row['PRICE'] for row in vehicles['28685']] == ['30000']
+    assert [(source['rows'], source['duplicates_dropped']) for source in vehicles.sources] == [(3, 0), (1, 1)]
+    vehicles.close()
+
+
+def test_multiple_exports_number_of_days(tmp_path):
+    files = [
+        write_export(tmp_path / 'new.csv', [('28685', 'VIN0000000000001', '30000', '5')]),
+        write_export(tmp_path / 'old.csv', [('28685', 'VIN0000000000001', '31000', '9')]),
+    ]
+
+    vehicles = process_inventory_files(files, backend='stdlib', dedupe='number_of_days')
+
+    assert [row['PRICE'] for row in vehicles['28685']] == ['31000']
+    vehicles.close()
+
+
+# BOM, CRLF endings, a quoted multi-line Description and a blank line
+AWKWARD_EXPORT = (
+    '\ufeffDealerID,VIN,PRICE,Description\r\n'
+    '28685,VIN0000000000001,30000,"Clean title.\r\nOne owner, ""loaded"""\r\n'
+    '\r\n'
+    '29312,VIN0000000000002,41000,\r\n'
+    '216163,VIN0000000000003,25000,"Line one\nLine two"\r\n'
+)
+
+# The second row has an extra field, the third is short
+RAGGED_EXPORT = (
+    'DealerID,VIN,PRICE,Description\n'
+    '28685,VIN0000000000001,30000,Clean\n'
+    '29312,VIN0000000000002,41000,Loaded,extra\n'
+    '148261,VIN0000000000004\n'
+)
+
+
+def write_text(path, text):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        f.write(text)
+    return str(path)
+
+
+@pytest.mark.parametrize('backend', ['stdlib', 'pyarrow', 'polars'])
+def test_csv_backends_match_stdlib(tmp_path, backend):
+    if backend != 'stdlib':
+        pytest.importorskip(backend)
+    path = write_text(tmp_path / 'export.csv', AWKWARD_EXPORT)
+
+    rows = list(read_inventory_rows(path, backend))
+
+    assert rows == list(read_inventory_rows(path, 'stdlib'))
+    assert [row['VIN'] for row in rows] == ['VIN0000000000001', 'VIN0000000000002', 'VIN0000000000003']
+    assert rows[0]['Description'] == 'Clean title.\nOne owner, "loaded"'
+    assert rows[1]['Description'] == ''
+    assert list(read_inventory_rows(path, backend, dealer_ids=['28685', '50912'])) == [rows[0], rows[2]]
+
+
+@pytest.mark.parametrize('backend', ['pyarrow', 'polars'])
+def test_csv_backends_fall_back_on_ragged_rows(tmp_path, backend):
+    pytest.importorskip(backend)
+    path = write_text(tmp_path / 'export.csv', RAGGED_EXPORT)
+
+    rows = list(read_inventory_rows(path, backend))
+
+    assert rows == list(read_inventory_rows(path, 'stdlib'))
+    assert rows[1][None] == ['extra']
+    assert rows[2]['PRICE'] == ''
+
+
+def write_multiline_export(path):
+    """An export whose Description values span lines and contain quotes, with some unknown dealers"""
+    dealer_ids = ['28685', '29312', '216163', '99999', '148261']
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f, lineterminator='\r\n')
+        writer.writerow(['DealerID', 'VIN', 'StockNo', 'PRICE', 'Description'])
+        for i in range(60):
+            description = f'Vehicle {i}, "certified"\nLine two\r\n\nLine four' if i % 3 else f'Vehicle {i}'
+            writer.writerow([dealer_ids[i % len(dealer_ids)], f'VIN{i:013d}', f'S{i}', str(20000 + i), description])
+    return str(path)
+
+
+@pytest.mark.parametrize('parts', [2, 3, 7, 16])
+def test_split_csv_records_on_record_boundaries(tmp_path, parts):
+    path = write_multiline_export(tmp_path / 'export.csv')
+    with open(path, 'rb') as f:
+        data = f.read()
+    header_end = data.index(b'\r\n') + 2
+
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunks = split_csv_records(mm, header_end, parts)
+
+    assert len(chunks) > 1
+    assert chunks[0][0] == header_end and chunks[-1][1] == len(data)
+    assert all(end == start for (_, end), (start, _) in zip(chunks, chunks[1:]))
+    records = []
+    for start, end in chunks:
+        records.extend(csv.reader(io.StringIO(data[start:end].decode('utf-8'), newline='')))
+    assert records == list(csv.reader(io.StringIO(data[header_end:].decode('utf-8'), newline='')))
+
+
+def test_parallel_parse_matches_sequential(tmp_path):
+    path = write_multiline_export(tmp_path / 'export.csv')
+    sequential_stats = SkipStats()
+    parallel_stats = SkipStats()
+
+    sequential = process_inventory(path, sequential_stats, backend='stdlib')
+    parallel = process_inventory_parallel(path, parallel_stats, workers=3)
+
+    assert parallel.counts() == sequential.counts()
+    assert dict(parallel.items()) == dict(sequential.items())
+    assert parallel_stats.summary() == sequential_stats.summary()
+    assert parallel_stats.total('skipped') == 12
+    assert parallel['28685'][1]['Description'] == 'Vehicle 5, "certified"\nLine two\n\nLine four'
+    sequential.close()
+    parallel.close()
@@ -0,0 +1,22 @@
+import threading
+
+from napleton_feeds.jobs import JobStore
+from napleton_feeds.targets import default_platforms
+
+
+def test_default_job_does_not_cover_opt_in_targets():
+    store = JobStore()
+    release = threading.Event()
+    try:
+        job, created = store.submit(lambda job: release.wait(5))
+        assert created and job.platforms == default_platforms()
+
+        # A second default trigger joins the running job
+        assert store.submit(lambda job: None) == (job, False)
+        assert store.submit(lambda job: None, platforms=['google']) == (job, False)
+
+        # An opt-in target is not part of the default run
+        tiktok, created = store.submit(lambda job: release.wait(5), platforms=['tiktok'])
+        assert created and tiktok is not job
+    finally:
+        release.set()
@@ -0,0 +1,46 @@
+import math
+
+import pytest
+
+from napleton_feeds.normalize import normalize_columns
+
+# (PRICE/MSRP, Miles, NumberOfDays): bad, negative, blank, inf and very large values
+ROWS = [
+    ('12,345.00', 'abc', 'x'),
+    ('-500', '-10', '-3'),
+    ('', '', ' 12 '),
+    ('0', 'inf', ''),
+    ('0.00', '1e400', '99999999999999999999999'),
+    ('abc', '12.7', '7'),
+    ('inf', '-0.5', '8'),
+    ('nan', '1e20', '60'),
+    ('1e400', 'nan', '61'),
+    ('99999999999999999999', '5,000', '1.5'),
+    (None, None, None),
+    (' 42 ', '42', '0'),
+]
+
+EXPECTED = {
+    'price': [12345.0, -500.0, None, None, None, None, math.inf, math.nan, math.inf, 1e20, None, 42.0],
+    'miles': [None, -10, None, None, None, 12, 0, 10 ** 20, None, None, None, 42],
+    'miles_bad': [True, False, False, True, True, False, False, False, True, True, False, False],
+    'days': [None, -3, 12, None, 99999999999999999999999, 7, 8, 60, 61, None, None, 0],
+    'days_bad': [True, False, False, False, False, False, False, False, False, True, False, False],
+    'age_label': [None, 'NEW_-3d', 'FRESH_12d', None, 'STALE_99999999999999999999999d', 'NEW_7d', 'FRESH_8d',
+                  'AGED_60d', 'STALE_61d', None, None, 'NEW_0d'],
+}
+EXPECTED['msrp'] = EXPECTED['price']
+
+
+@pytest.mark.parametrize('backend', ['python', 'numpy'])
+def test_backends_produce_identical_columns(backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    vehicles = [{'PRICE': price, 'MSRP': price, 'Miles': miles, 'NumberOfDays': days} for price, miles, days in ROWS]
+
+    columns = normalize_columns(vehicles, backend)
+
+    assert set(columns) == set(EXPECTED)
+    for name, expected in EXPECTED.items():
+        # repr so NaN compares equal to NaN, and 0 to 0 but not to 0.0 or False
+        assert [repr(value) for value in columns[name]] == [repr(value) for value in expected], name
@@ -0,0 +1,36 @@
+import asyncio
+import csv
+
+from napleton_feeds.inventory import process_inventory
+from napleton_feeds.pipeline import run_feed_pipeline
+from napleton_feeds.scheduler import DeadlineScheduler
+from napleton_feeds.stats import SkipStats
+
+FIELDS = ['DealerID', 'VIN', 'StockNo', 'New/Used', 'Year', 'Make', 'Model', 'PRICE', 'MSRP', 'Miles', 'VDPURL']
+
+
+def test_unpublished_feeds_are_reported_failed(tmp_path):
+    path = tmp_path / 'inventory.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for dealer_id, vin in [('28685', '1GNSKCKD0NR100001'), ('29312', '1GNSKCKD0NR100002')]:
+            writer.writerow({'DealerID': dealer_id, 'VIN': vin, 'StockNo': vin[-6:], 'New/Used': 'U', 'Year': '2022',
+                             'Make': 'Chevrolet', 'Model': 'Tahoe', 'PRICE': '30000', 'MSRP': '0', 'Miles': '1000',
+                             'VDPURL': 'https://example.com/' + vin})
+    stats = SkipStats()
+    vehicles = process_inventory(str(path), stats, backend='stdlib')
+    scheduler = DeadlineScheduler()
+    tasks = scheduler.plan(vehicles.counts(), ['facebook', 'google'])
+
+    def publish(task, content, feed_stats, row_hashes):
+        # e.g. a failed Blob upload
+        return task.dealer_id != '29312'
+
+    schedule = asyncio.run(run_feed_pipeline(scheduler, tasks, vehicles, stats, publish))
+
+    assert sorted((feed['dealer_id'], feed['platform']) for feed in schedule['refreshed']) == \
+        [('28685', 'facebook'), ('28685', 'google')]
+    assert sorted((feed['dealer_id'], feed['platform']) for feed in schedule['failed']) == \
+        [('29312', 'facebook'), ('29312', 'google')]
+    vehicles.close()
@@ -0,0 +1,33 @@
+import pytest
+
+from napleton_feeds.query import InventoryIndex
+
+
+def make_index():
+    vehicles = [{'dealer_id': '28685', 'make': make, 'model': 'Model', 'condition': 'used', 'body_style': 'suv',
+                 'price': price, 'mileage': 1000, 'days_on_lot': 10}
+                for make, price in [('Chevrolet', 30000.0), ('Chevrolet', 25000.0), ('Buick', 40000.0),
+                                    ('Chevrolet', 35000.0), ('GMC', 45000.0)]]
+    return InventoryIndex(vehicles, 'snapshot', '2026-10-19T00:00:00')
+
+
+def test_cursor_pages_through_the_same_query():
+    index = make_index()
+    first = index.query({'make': ['Chevrolet']}, sort='price', limit=2)
+    # Same query, filter values in another case and order
+    second = index.query({'make': ['chevrolet']}, sort='price', limit=2, cursor=first['next_cursor'])
+    assert [v['price'] for v in first['vehicles'] + second['vehicles']] == [25000.0, 30000.0, 35000.0]
+    assert second['next_cursor'] is None
+
+
+@pytest.mark.parametrize('changed', [
+    {'filters': {'make': ['Buick']}, 'sort': 'price', 'limit': 2},
+    {'filters': {'make': ['Chevrolet']}, 'sort': '-price', 'limit': 2},
+    {'filters': {'make': ['Chevrolet']}, 'sort': 'price', 'limit': 1},
+    {'filters': {'make': ['Chevrolet']}, 'ranges': {'price': (None, 30000)}, 'sort': 'price', 'limit': 2},
+])
+def test_cursor_rejects_a_different_query(changed):
+    index = make_index()
+    cursor = index.query({'make': ['Chevrolet']}, sort='price', limit=2)['next_cursor']
+    with pytest.raises(ValueError, match='different query'):
+        index.query(cursor=cursor, **changed)
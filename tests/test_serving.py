@@ -0,0 +1,16 @@
+from napleton_feeds.serving import _accepts_gzip
+
+
+def test_accepts_gzip():
+    assert _accepts_gzip('gzip, deflate, br')
+    assert _accepts_gzip('br;q=1.0, gzip;q=0.8')
+    assert _accepts_gzip('*')
+    assert not _accepts_gzip(None)
+    assert not _accepts_gzip('identity')
+    assert not _accepts_gzip('gzip;q=0')
+    assert not _accepts_gzip('gzip;q=0.000')
+
+
+def test_accepts_gzip_malformed_q_value():
+    assert not _accepts_gzip('gzip;q=abc')
+    assert not _accepts_gzip('*;q=')